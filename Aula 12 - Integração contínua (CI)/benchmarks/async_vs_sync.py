@@ -0,0 +1,106 @@
+"""
+Benchmark de throughput: caminho síncrono (Session + handlers `def` no threadpool) vs caminho assíncrono (AsyncSession + handlers `async def`).
+
+Uso:
+    python -m benchmarks.async_vs_sync --requests 2000 --concurrency 100
+
+O caminho síncrono é uma reprodução fiel do `list_todos` anterior à migração para async, rodando sobre o mesmo banco SQLite em arquivo.
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Annotated
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from fast_zero.app import app as async_app
+from fast_zero.database import get_session
+from fast_zero.models import Todo, TodoState, User, table_registry
+from fast_zero.schemas import TodoPublicSchema
+from fast_zero.security import create_access_token
+
+
+def build_sync_app(engine) -> FastAPI:
+    def get_sync_session():
+        with Session(engine) as session:
+            yield session
+
+    app = FastAPI()
+
+    @app.get('/todos', response_model=list[TodoPublicSchema])
+    def list_todos(session: Annotated[Session, Depends(get_sync_session)]):
+        user = session.scalar(select(User).where(User.email == 'bench@example.com'))
+        return session.scalars(select(Todo).where(Todo.user_id == user.id).limit(100)).all()
+
+    return app
+
+
+def seed(engine, todos: int):
+    table_registry.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        user = User(username='bench', email='bench@example.com', password='x')
+        session.add(user)
+        session.flush()
+        session.add_all(Todo(title=f'todo {i}', description='bench', state=TodoState.todo, user_id=user.id) for i in range(todos))
+        session.commit()
+
+
+async def run(app: FastAPI, requests: int, concurrency: int, headers: dict) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+
+        async def one():
+            async with semaphore:
+                response = await client.get('/todos', headers=headers)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+
+    return requests / (time.perf_counter() - start)
+
+
+async def main(requests: int, concurrency: int, todos: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'bench.db'
+        sync_engine = create_engine(f'sqlite:///{db_path}', connect_args={'check_same_thread': False})
+        async_engine = create_async_engine(f'sqlite+aiosqlite:///{db_path}')
+        seed(sync_engine, todos)
+
+        async def get_session_override():
+            async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                yield session
+
+        async_app.dependency_overrides[get_session] = get_session_override
+        headers = {'Authorization': f'Bearer {create_access_token({"sub": "bench@example.com"})}'}
+
+        sync_rps = await run(build_sync_app(sync_engine), requests, concurrency, headers)
+        async_rps = await run(async_app, requests, concurrency, headers)
+
+        async_app.dependency_overrides.clear()
+        await async_engine.dispose()
+        sync_engine.dispose()
+
+    print(f'requests={requests} concurrency={concurrency} todos/página={min(todos, 100)}')
+    print(f'sync : {sync_rps:10.1f} req/s')
+    print(f'async: {async_rps:10.1f} req/s ({async_rps / sync_rps:.2f}x)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--todos', type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.requests, args.concurrency, args.todos))
@@ -0,0 +1,68 @@
+"""
+Microbenchmark de assinatura e verificação de tokens por algoritmo (HS256, ES256, EdDSA).
+
+Uso:
+    python -m benchmarks.jwt_algorithms --iterations 5000
+
+Para cada algoritmo mede o TokenEngine (chaves preparadas uma vez) e o uso direto do PyJWT com a chave "crua" a cada chamada (string do segredo ou PEM), como era antes.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+
+from fast_zero.generate_jwt_key import generate_private_key_pem
+from fast_zero.tokens import TokenEngine, hmac_key, load_private_key
+
+PAYLOAD = {'sub': 'bench@example.com', 'uid': 1, 'exp': 4_102_444_800}
+
+
+def per_second(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return iterations / (time.perf_counter() - start)
+
+
+def main(iterations: int):
+    secret = 'bench-secret-with-enough-entropy-0123456789'
+    rows = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engines = {'HS256': (TokenEngine('HS256', [hmac_key(secret)]), secret, secret)}
+
+        for algorithm in ('ES256', 'EdDSA'):
+            path = Path(tmp) / f'{algorithm}.pem'
+            path.write_bytes(generate_private_key_pem(algorithm))
+            key = load_private_key(algorithm, path)
+            public_pem = key.verifying_key.public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+            engines[algorithm] = (TokenEngine(algorithm, [key]), path.read_bytes(), public_pem)
+
+        for algorithm, (engine, raw_signing_key, raw_verifying_key) in engines.items():
+            token = engine.encode(PAYLOAD)
+            raw_token = jwt.encode(PAYLOAD, raw_signing_key, algorithm=algorithm)
+
+            rows.append((
+                algorithm,
+                per_second(lambda: engine.encode(PAYLOAD), iterations),
+                per_second(lambda: jwt.encode(PAYLOAD, raw_signing_key, algorithm=algorithm), iterations),
+                per_second(lambda: engine.decode(token), iterations),
+                per_second(lambda: jwt.decode(raw_token, raw_verifying_key, algorithms=[algorithm]), iterations),
+            ))
+
+    print(f'iterations={iterations} (operações por segundo, maior é melhor)')
+    print(f'{"algoritmo":<8} {"assinar":>10} {"(cru)":>10} {"verificar":>10} {"(cru)":>10}')
+    for algorithm, sign, raw_sign, verify, raw_verify in rows:
+        print(f'{algorithm:<8} {sign:10.0f} {raw_sign:10.0f} {verify:10.0f} {raw_verify:10.0f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=5000)
+    args = parser.parse_args()
+
+    main(args.iterations)
@@ -0,0 +1,97 @@
+"""
+Benchmark da busca do usuário no login: `username = x OR email = x` vs uma consulta por índice (get_user_by_login).
+
+Uso:
+    python -m benchmarks.login_lookup --users 1000000 --lookups 5000
+
+Popula uma tabela users com `--users` linhas (SQLite em arquivo temporário, com os índices do modelo), mostra o plano de execução de cada forma e mede o tempo médio por login, alternando logins por username, por email como cadastrado e por email em maiúsculas (com '@', email exato, lower(email) e username vão em uma única consulta UNION ALL).
+Para medir no Postgres, passe `--url postgresql+asyncpg://...` apontando para um banco vazio.
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from fast_zero.models import User, table_registry
+from fast_zero.routers.auth import LOGIN_LOOKUP_QUERY, get_user_by_login
+
+BATCH_SIZE = 50_000
+
+
+async def seed(engine, users: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+
+        for start in range(0, users, BATCH_SIZE):
+            rows = [{'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'x'} for i in range(start, min(start + BATCH_SIZE, users))]
+            await conn.execute(insert(User), rows)
+
+
+async def explain(session: AsyncSession, query, params: dict | None = None) -> str:
+    dialect = session.bind.dialect.name
+    compiled = query.compile(session.bind.sync_engine)
+    bound = compiled.construct_params(params)
+    conn = await session.connection()
+
+    if dialect == 'sqlite':
+        rows = await conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', tuple(bound[name] for name in compiled.positiontup))
+        return ' | '.join(row.detail for row in rows)
+
+    rows = await conn.exec_driver_sql(f'EXPLAIN {compiled}', tuple(bound[name] for name in compiled.positiontup))
+    return ' | '.join(row[0] for row in rows)
+
+
+async def measure(session: AsyncSession, lookup, logins: list[str]) -> float:
+    start = time.perf_counter()
+
+    for login in logins:
+        assert await lookup(login) is not None
+        session.expunge_all()  # Sem o identity map, cada login vai ao banco como em requisições separadas
+
+    return (time.perf_counter() - start) / len(logins) * 1_000_000
+
+
+async def main(url: str | None, users: int, lookups: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(url or f'sqlite+aiosqlite:///{Path(tmp) / "bench.db"}')
+        await seed(engine, users)
+
+        ids = random.sample(range(users), k=min(lookups, users))
+        logins = [(f'user{i}', f'user{i}@example.com', f'USER{i}@EXAMPLE.COM')[n % 3] for n, i in enumerate(ids)]
+
+        async with AsyncSession(engine) as session:
+
+            def or_query(login):
+                return select(User).where((User.username == login) | (User.email == login))
+
+            async def or_lookup(login):
+                # A forma antiga compara o email diferenciando maiúsculas, então usa o valor já em minúsculas para encontrar o usuário
+                return await session.scalar(or_query(login.lower() if '@' in login else login))
+
+            async def index_lookup(login):
+                return await get_user_by_login(login, session)
+
+            print(f'users={users} lookups={len(logins)} banco={engine.dialect.name}')
+            print(f'plano OR   : {await explain(session, or_query("user1@example.com"))}')
+            print(f'plano email: {await explain(session, LOGIN_LOOKUP_QUERY, {"login": "user1@example.com"})}')
+            print(f'OR         : {await measure(session, or_lookup, logins):8.1f} µs/login')
+            print(f'índice     : {await measure(session, index_lookup, logins):8.1f} µs/login')
+
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None)
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--lookups', type=int, default=5000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.url, args.users, args.lookups))
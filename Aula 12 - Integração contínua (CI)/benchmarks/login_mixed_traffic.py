@@ -0,0 +1,114 @@
+"""
+Benchmark de login sob tráfego misto: hash de senhas no threadpool vs no pool de processos.
+
+Uso:
+    python -m benchmarks.login_mixed_traffic --logins 200 --reads 2000 --concurrency 50
+
+Logins (Argon2) e leituras de GET /todos disparam ao mesmo tempo contra a aplicação. Para cada modo são medidos o throughput de logins e a latência das leituras, que é o que sofre quando o hash disputa o GIL com o resto da API.
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from fast_zero.app import app
+from fast_zero.database import get_session
+from fast_zero.hashing import PasswordHasher
+from fast_zero.models import Todo, TodoState, User, table_registry
+from fast_zero.routers import auth, users
+from fast_zero.security import create_access_token, get_password_hash
+
+PASSWORD = 'bench-password'
+
+
+async def seed(engine, todos: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    async with AsyncSession(engine) as session:
+        user = User(username='bench', email='bench@example.com', password=get_password_hash(PASSWORD))
+        session.add(user)
+        await session.flush()
+        session.add_all(Todo(title=f'todo {i}', description='bench', state=TodoState.todo, user_id=user.id) for i in range(todos))
+        await session.commit()
+
+
+async def run(logins: int, reads: int, concurrency: int, headers: dict) -> tuple[float, list[float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    read_latencies = []
+    login_durations = []
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+
+        async def login():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post('/auth/token', data={'username': 'bench', 'password': PASSWORD})
+                response.raise_for_status()
+                login_durations.append(time.perf_counter() - start)
+
+        async def read():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get('/todos', headers=headers)
+                response.raise_for_status()
+                read_latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)), *(read() for _ in range(reads)))
+        elapsed = time.perf_counter() - start
+
+    return logins / elapsed, read_latencies
+
+
+def use_hasher(hasher: PasswordHasher):
+    # Os routers importam a instância global, então o benchmark troca a referência em cada módulo
+    auth.password_hasher = hasher
+    users.password_hasher = hasher
+
+
+async def main(logins: int, reads: int, concurrency: int, workers: int | None):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f'sqlite+aiosqlite:///{Path(tmp) / "bench.db"}')
+        await seed(engine, 100)
+
+        async def get_session_override():
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_session_override
+        headers = {'Authorization': f'Bearer {create_access_token({"sub": "bench@example.com"})}'}
+        max_pending = logins + reads  # Sem descarte de carga aqui: o objetivo é medir throughput
+
+        results = {}
+        for name, hasher in (('threadpool', PasswordHasher(0, max_pending)), ('processos', PasswordHasher(workers, max_pending))):
+            use_hasher(hasher)
+            await hasher.verify(PASSWORD, get_password_hash(PASSWORD))  # Aquece o pool (cria os processos) fora da medição
+            results[name] = await run(logins, reads, concurrency, headers)
+            hasher.shutdown()
+
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    print(f'logins={logins} leituras={reads} concurrency={concurrency} workers={workers or "cpu_count"}')
+    for name, (logins_per_second, latencies) in results.items():
+        p95 = statistics.quantiles(latencies, n=20)[-1] * 1000
+        print(f'{name:<10}: {logins_per_second:8.1f} logins/s | GET /todos p50={statistics.median(latencies) * 1000:7.1f}ms p95={p95:7.1f}ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--reads', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.logins, args.reads, args.concurrency, args.workers))
@@ -0,0 +1,108 @@
+"""
+Benchmark da listagem de tarefas: carregar objetos do ORM (select(Todo)) vs projetar só as colunas da resposta (select(*columns_for(TodoPublicSchema, Todo))).
+
+Uso:
+    python -m benchmarks.projection --todos 100000 --limit 100
+
+Popula uma tabela todos com `--todos` linhas (SQLite em arquivo temporário) e percorre todas as páginas com o cursor, como um cliente faria, validando cada página com TodoPublicSchema como o FastAPI faz na resposta.
+Mostra as linhas por segundo e o pico de memória alocada (tracemalloc) por página em cada forma. Para medir no Postgres, passe `--url postgresql+asyncpg://...` apontando para um banco vazio.
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from fast_zero.models import Todo, TodoState, User, table_registry
+from fast_zero.schemas import FilterPage, TodoPublicSchema
+from fast_zero.utils import columns_for, encode_cursor, paginate
+
+BATCH_SIZE = 50_000
+
+page_adapter = TypeAdapter(list[TodoPublicSchema])
+
+
+async def seed(engine, todos: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(insert(User), [{'username': 'bench', 'email': 'bench@example.com', 'password': 'x'}])
+
+        for start in range(0, todos, BATCH_SIZE):
+            rows = [{'title': f'Tarefa {i}', 'description': f'Descrição da tarefa {i} ' * 10, 'state': TodoState.todo, 'user_id': 1} for i in range(start, min(start + BATCH_SIZE, todos))]
+            await conn.execute(insert(Todo), rows)
+
+
+async def read_pages(session: AsyncSession, query, fetch, limit: int, trace: bool) -> tuple[int, list[int]]:
+    """Percorre todas as páginas. Retorna o total de linhas e, com `trace`, o pico de memória alocada em cada página."""
+    rows = 0
+    peaks = []
+    cursor = None
+
+    while True:
+        if trace:
+            tracemalloc.start()
+
+        page = await fetch(session, paginate(query, Todo, FilterPage(limit=limit, cursor=cursor)))
+        page_adapter.validate_python(page, from_attributes=True)
+
+        if trace:
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        session.expunge_all()  # Cada página é uma requisição nova, com a sessão vazia
+        rows += len(page)
+
+        if len(page) < limit:
+            return rows, peaks
+
+        cursor = encode_cursor(page[-1].id)
+
+
+async def measure(session: AsyncSession, query, fetch, limit: int) -> tuple[float, float]:
+    """Linhas por segundo e pico médio de memória por página (KiB). O tempo é medido numa passada sem o tracemalloc, que deixaria tudo mais lento."""
+    start = time.perf_counter()
+    rows, _ = await read_pages(session, query, fetch, limit, trace=False)
+    rate = rows / (time.perf_counter() - start)
+
+    _, peaks = await read_pages(session, query, fetch, limit, trace=True)
+
+    return rate, sum(peaks) / len(peaks) / 1024
+
+
+async def main(url: str | None, todos: int, limit: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(url or f'sqlite+aiosqlite:///{Path(tmp) / "bench.db"}')
+        await seed(engine, todos)
+
+        async def fetch_objects(session, query):
+            return (await session.scalars(query)).all()
+
+        async def fetch_rows(session, query):
+            return (await session.execute(query)).all()
+
+        async with AsyncSession(engine) as session:
+            orm_rate, orm_peak = await measure(session, select(Todo), fetch_objects, limit)
+            projected_rate, projected_peak = await measure(session, select(*columns_for(TodoPublicSchema, Todo)), fetch_rows, limit)
+
+        print(f'todos={todos} limit={limit} banco={engine.dialect.name}')
+        print(f'ORM     : {orm_rate:10.0f} linhas/s  {orm_peak:8.1f} KiB/página')
+        print(f'projeção: {projected_rate:10.0f} linhas/s  {projected_peak:8.1f} KiB/página')
+
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None)
+    parser.add_argument('--todos', type=int, default=100_000)
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.url, args.todos, args.limit))
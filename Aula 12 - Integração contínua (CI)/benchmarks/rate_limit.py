@@ -0,0 +1,37 @@
+"""
+Microbenchmark do custo de uma verificação do limitador de login (MemoryRateLimiter.hit).
+
+Uso:
+    python -m benchmarks.rate_limit --checks 1000000 --keys 10000
+
+Mede o tempo médio por verificação com `--keys` chaves distintas (ex: IPs e usernames de uma rajada de credential stuffing), incluindo o custo do `await`.
+O objetivo é ficar em poucos microssegundos, desprezível perto de uma consulta ao banco ou de um hash Argon2.
+"""
+
+import argparse
+import asyncio
+import time
+
+from fast_zero.rate_limit import MemoryRateLimiter
+
+
+async def main(checks: int, keys: int):
+    limiter = MemoryRateLimiter()
+    names = [f'ip:10.0.{n // 256}.{n % 256}' for n in range(keys)]
+
+    start = time.perf_counter()
+    for n in range(checks):
+        await limiter.hit(names[n % keys], 20, 1.0)
+    elapsed = time.perf_counter() - start
+
+    print(f'checks={checks} keys={keys}')
+    print(f'{elapsed / checks * 1_000_000:.2f} µs por verificação')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checks', type=int, default=1_000_000)
+    parser.add_argument('--keys', type=int, default=10_000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.checks, args.keys))
@@ -0,0 +1,82 @@
+"""
+Benchmark da serialização das listagens: o caminho padrão do FastAPI (response_model) vs o ORJSONResponse vs o SchemaListResponse (TypeAdapter pré-compilado).
+
+Uso:
+    python -m benchmarks.serialization --sizes 10 100 1000 --repeat 2000
+
+Para cada tamanho de página busca linhas de tarefas com a mesma projeção do list_todos (SQLite em memória) e mede o tempo médio para transformá-las no corpo da resposta:
+- fastapi+json  : serialize_response do FastAPI (valida e converte para dicionários) + JSONResponse (json da biblioteca padrão), o comportamento original
+- fastapi+orjson: o mesmo serialize_response + ORJSONResponse, o que muda com a classe de resposta padrão
+- adapter       : SchemaListResponse, que valida uma vez e codifica direto para bytes JSON
+"""
+
+import argparse
+import asyncio
+import time
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import create_engine, insert, select
+
+from fast_zero.models import Todo, TodoState, User, table_registry
+from fast_zero.responses import SchemaListResponse, todo_list_adapter
+from fast_zero.schemas import TodoPublicSchema
+from fast_zero.utils import columns_for
+
+# O campo que o FastAPI cria para response_model=list[TodoPublicSchema]
+response_field = create_model_field(name='Response_list_todos', type_=list[TodoPublicSchema], mode='serialization')
+
+
+def fetch_rows(size: int) -> list:
+    engine = create_engine('sqlite://')
+    table_registry.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{'username': 'bench', 'email': 'bench@example.com', 'password': 'x'}])
+        conn.execute(insert(Todo), [{'title': f'Tarefa {i}', 'description': f'Descrição da tarefa {i} ' * 5, 'state': TodoState.todo, 'user_id': 1} for i in range(size)])
+        rows = conn.execute(select(*columns_for(TodoPublicSchema, Todo)).order_by(Todo.id)).all()
+
+    engine.dispose()
+
+    return rows
+
+
+async def fastapi_body(rows, response_class) -> bytes:
+    return response_class(await serialize_response(field=response_field, response_content=rows)).body
+
+
+async def adapter_body(rows) -> bytes:
+    return SchemaListResponse(todo_list_adapter, rows).body
+
+
+async def measure(encode, rows, repeat: int) -> float:
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        await encode(rows)
+
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+async def main(sizes: list[int], repeat: int):
+    print(f'{"itens":>6} {"fastapi+json":>14} {"fastapi+orjson":>16} {"adapter":>10}  (µs/página)')
+
+    for size in sizes:
+        rows = fetch_rows(size)
+        assert await fastapi_body(rows, ORJSONResponse) == await adapter_body(rows)  # Os três caminhos geram o mesmo JSON
+
+        baseline = await measure(lambda rows: fastapi_body(rows, JSONResponse), rows, repeat)
+        orjson = await measure(lambda rows: fastapi_body(rows, ORJSONResponse), rows, repeat)
+        adapter = await measure(adapter_body, rows, repeat)
+
+        print(f'{size:>6} {baseline:>14.1f} {orjson:>16.1f} {adapter:>10.1f}  adapter {baseline / adapter:.1f}x mais rápido')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.sizes, args.repeat))
@@ -1,13 +1,32 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from fast_zero.routers import auth, todos, users
+from fast_zero.hashing import password_hasher
+from fast_zero.rate_limit import warn_if_rate_limit_is_per_worker
+from fast_zero.responses import ORJSONResponse
+from fast_zero.routers import auth, metrics, todos, users
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warn_if_rate_limit_is_per_worker()
+
+    yield
+
+    # Encerra os processos do pool de hash de senhas junto com a aplicação
+    password_hasher.shutdown()
+
 
 app = FastAPI(
     debug=True,
     title='Aula - Dockerizando FastAPI',
     description='Criando e gerenciando tarefas',
     version='0.1.0',
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # Respostas codificadas pelo orjson (ver fast_zero/responses.py)
 )
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(todos.router)
+app.include_router(metrics.router)
@@ -0,0 +1,80 @@
+"""
+Escolhe os parâmetros do Argon2 para um tempo alvo por hash nesta máquina.
+
+Uso:
+    python -m fast_zero.calibrate_password_hash --target-ms 50
+
+Mantém o paralelismo informado e começa pela memória máxima: aumenta o número de iterações (time_cost) enquanto o hash fica abaixo do alvo e, se mesmo com uma iteração ele passar do alvo, reduz a memória pela metade até atingir `--min-memory-kib`.
+O resultado sai no formato do .env (PASSWORD_HASH_TIME_COST, PASSWORD_HASH_MEMORY_COST, PASSWORD_HASH_PARALLELISM). Hashes existentes são refeitos com os novos parâmetros no próximo login de cada usuário.
+"""
+
+import argparse
+import statistics
+from time import perf_counter
+
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+MAX_TIME_COST = 20
+
+
+def measure(time_cost: int, memory_cost: int, parallelism: int, samples: int) -> float:
+    """Mediana, em milissegundos, do tempo de um hash com os parâmetros informados."""
+    hasher = Argon2Hasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    durations = []
+
+    for _ in range(samples):
+        start = perf_counter()
+        hasher.hash('calibration-password')
+        durations.append((perf_counter() - start) * 1000)
+
+    return statistics.median(durations)
+
+
+def calibrate(target_ms: float, max_memory_kib: int, min_memory_kib: int, parallelism: int, samples: int) -> tuple[int, int, float]:
+    """Retorna (time_cost, memory_cost, ms) com o maior custo que ainda fica dentro do tempo alvo."""
+    memory_cost = max_memory_kib
+
+    while True:
+        elapsed = measure(1, memory_cost, parallelism, samples)
+
+        if elapsed <= target_ms or memory_cost // 2 < min_memory_kib:
+            break
+
+        memory_cost //= 2
+
+    time_cost = 1
+
+    while time_cost < MAX_TIME_COST:
+        next_elapsed = measure(time_cost + 1, memory_cost, parallelism, samples)
+
+        if next_elapsed > target_ms:
+            break
+
+        time_cost, elapsed = time_cost + 1, next_elapsed
+
+    return time_cost, memory_cost, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target-ms', type=float, default=50.0)
+    parser.add_argument('--max-memory-kib', type=int, default=65536)
+    parser.add_argument('--min-memory-kib', type=int, default=19456)  # Mínimo recomendado pela OWASP para o Argon2id
+    parser.add_argument('--parallelism', type=int, default=4)
+    parser.add_argument('--samples', type=int, default=5)
+    args = parser.parse_args()
+
+    time_cost, memory_cost, elapsed = calibrate(args.target_ms, args.max_memory_kib, args.min_memory_kib, args.parallelism, args.samples)
+
+    print(f'# {elapsed:.1f} ms por hash (alvo: {args.target_ms:.1f} ms)')
+
+    if elapsed > args.target_ms:
+        print('# Alvo não atingido nem com uma iteração e a memória mínima: reduza --parallelism/--min-memory-kib ou aceite um tempo maior')
+
+    print(f'PASSWORD_HASH_TIME_COST={time_cost}')
+    print(f'PASSWORD_HASH_MEMORY_COST={memory_cost}')
+    print(f'PASSWORD_HASH_PARALLELISM={args.parallelism}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,186 @@
-from sqlalchemy import create_engine
+from dataclasses import dataclass
+from itertools import count
+from time import perf_counter
+from typing import Annotated
+
+from fastapi import Depends
+from sqlalchemy import CompoundSelect, Select, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from fast_zero.settings import settings
 
-engine = create_engine(settings.DATABASE_URL)  # echo=True para ver os logs das queries SQL geradas
+
+@dataclass
+class CheckoutWaitMetrics:
+    """Acumula durações medidas (quantidade, total e máximo), ex: o tempo esperando uma conexão livre do pool."""
+
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Pool de conexões que mede o tempo de espera de cada checkout e por quanto tempo cada conexão fica emprestada até voltar ao pool.
+
+    O engine.dispose() troca o pool por outro criado em recreate(), que copia os listeners deste (o `_dispatch`). Por isso o novo pool recebe as mesmas métricas
+    e não registra listeners próprios: os copiados já gravam nelas, e registrar de novo mediria cada devolução duas vezes. Assim as métricas acumulam entre dispose().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_wait = CheckoutWaitMetrics()
+        self.checkout_hold = CheckoutWaitMetrics()
+
+        if '_dispatch' not in kwargs:
+            event.listen(self, 'checkout', self._on_checkout)
+            event.listen(self, 'checkin', self._on_checkin)
+
+    def recreate(self) -> 'InstrumentedQueuePool':
+        pool = super().recreate()
+        pool.checkout_wait, pool.checkout_hold = self.checkout_wait, self.checkout_hold
+        return pool
+
+    @staticmethod
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checked_out_at'] = perf_counter()
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop('checked_out_at', None)
+
+        if checked_out_at is not None:
+            self.checkout_hold.record(perf_counter() - checked_out_at)
+
+    def connect(self):
+        start = perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.checkout_wait.record(perf_counter() - start)
+
+
+def create_engine_from_settings(url: str) -> AsyncEngine:
+    """
+    Cria o engine assíncrono aplicando as configurações de pool do Settings.
+
+    Bancos SQLite em memória não usam QueuePool (a conexão é única), então eles ficam com o pool padrão do SQLAlchemy.
+    """
+    if make_url(url).database in {None, '', ':memory:'}:
+        return create_async_engine(url)
+
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+    )
+
+
+def get_pool_metrics(engine: AsyncEngine) -> dict:
+    """Retorna o estado atual do pool de conexões do engine."""
+    pool = engine.pool
+
+    if not isinstance(pool, InstrumentedQueuePool):
+        return {'pool_class': type(pool).__name__}
+
+    wait, hold = pool.checkout_wait, pool.checkout_hold
+
+    return {
+        'pool_class': type(pool).__name__,
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'idle': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),  # O overflow fica negativo enquanto o pool ainda não abriu todas as conexões
+        'checkouts': wait.count,
+        'checkout_wait_avg_ms': wait.total_seconds / wait.count * 1000 if wait.count else 0.0,
+        'checkout_wait_max_ms': wait.max_seconds * 1000,
+        'checkout_hold_avg_ms': hold.total_seconds / hold.count * 1000 if hold.count else 0.0,
+        'checkout_hold_max_ms': hold.max_seconds * 1000,
+    }
 
 
-def get_session():  # pragma: no cover
-    with Session(engine) as session:
+class ReplicaSelector:
+    """Escolhe qual réplica de leitura vai atender uma sessão ('round_robin' ou 'least_connections')."""
+
+    def __init__(self, engines: list[AsyncEngine], strategy: str = 'round_robin'):
+        self.engines = engines
+        self.strategy = strategy
+        self._counter = count()
+
+    def choose(self) -> AsyncEngine | None:
+        if not self.engines:
+            return None
+
+        if self.strategy == 'least_connections':
+            return min(self.engines, key=lambda replica: getattr(replica.pool, 'checkedout', lambda: 0)())
+
+        return self.engines[next(self._counter) % len(self.engines)]
+
+
+class RoutingSession(Session):
+    """
+    Sessão que direciona leituras para uma réplica e escritas para o banco principal.
+
+    - Apenas SELECTs vão para a réplica, e a mesma réplica é usada durante toda a sessão.
+    - Depois da primeira escrita (flush, INSERT, UPDATE, DELETE...) a sessão fica "presa" ao principal, garantindo que leituras após escrita (ex: refresh) vejam o dado recém gravado.
+    """
+
+    def __init__(self, *args, primary: AsyncEngine, replicas: ReplicaSelector, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.primary = primary
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if not self.info.get('wrote') and not self._flushing and isinstance(clause, (Select, CompoundSelect)):
+            if 'replica' not in self.info:
+                self.info['replica'] = self.replicas.choose() or self.primary
+
+            return self.info['replica'].sync_engine
+
+        if clause is not None or self._flushing:
+            self.info['wrote'] = True
+
+        return self.primary.sync_engine
+
+
+engine = create_engine_from_settings(settings.DATABASE_URL)  # echo=True para ver os logs das queries SQL geradas
+replicas = ReplicaSelector(
+    engines=[create_engine_from_settings(url) for url in settings.DATABASE_REPLICA_URLS],
+    strategy=settings.DATABASE_REPLICA_STRATEGY,
+)
+
+
+def create_session() -> AsyncSession:
+    # expire_on_commit=False evita que os atributos expirem após o commit, o que exigiria um novo SELECT (e no modo assíncrono não existe lazy load implícito)
+    return AsyncSession(sync_session_class=RoutingSession, primary=engine, replicas=replicas, expire_on_commit=False)
+
+
+async def get_session():  # pragma: no cover
+    async with create_session() as session:
         yield session
+
+
+async def get_primary_session(session: Annotated[AsyncSession, Depends(get_session)]) -> AsyncSession:
+    """
+    Sessão das rotas que escrevem: prende a sessão ao banco principal desde a primeira consulta.
+
+    Sem isso as verificações feitas antes da escrita (ex: se o username já existe) iriam para uma réplica, que pode estar atrasada, e a duplicidade só apareceria no UPDATE como IntegrityError.
+    """
+    session.info['wrote'] = True  # O mesmo marcador que o RoutingSession grava na primeira escrita
+    return session
+
+
+def get_session_factory():  # pragma: no cover
+    """Fornece a fábrica de sessões para tarefas que rodam depois da resposta (BackgroundTasks), quando a sessão da requisição já foi fechada."""
+    return create_session
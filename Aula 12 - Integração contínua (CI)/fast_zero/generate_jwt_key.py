@@ -0,0 +1,37 @@
+"""
+Gera uma chave privada para assinar tokens com ES256 ou EdDSA.
+
+Uso:
+    python -m fast_zero.generate_jwt_key --algorithm EdDSA keys/2026-10.pem
+
+O nome do arquivo sem extensão vira o "kid" da chave. Para rotacionar, coloque o novo arquivo no início de JWT_PRIVATE_KEY_FILES.
+"""
+
+import argparse
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+
+def generate_private_key_pem(algorithm: str) -> bytes:
+    private_key = ec.generate_private_key(ec.SECP256R1()) if algorithm == 'ES256' else ed25519.Ed25519PrivateKey.generate()
+
+    return private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--algorithm', choices=['ES256', 'EdDSA'], default='EdDSA')
+    parser.add_argument('path', type=Path)
+    args = parser.parse_args()
+
+    args.path.parent.mkdir(parents=True, exist_ok=True)
+    args.path.write_bytes(generate_private_key_pem(args.algorithm))
+    args.path.chmod(0o600)  # Apenas o dono do arquivo pode ler a chave privada
+
+    print(f'Chave {args.algorithm} gravada em {args.path} (kid={args.path.stem})')
+
+
+if __name__ == '__main__':
+    main()
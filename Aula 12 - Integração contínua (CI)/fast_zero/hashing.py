@@ -0,0 +1,70 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+from fast_zero.security import get_password_hash, verify_and_update_password, verify_password
+from fast_zero.settings import settings
+
+
+class PasswordHasher:
+    """
+    Serviço que executa o hash/verificação de senhas (Argon2) em um pool de processos.
+
+    O Argon2 consome dezenas de milissegundos de CPU e bastante memória por chamada. Rodando no threadpool ele disputa o GIL com o resto da aplicação, então uma rajada de logins ou cadastros deixa todas as outras rotas lentas. Em processos separados o custo sai do processo da API.
+
+    A fila é limitada por `max_pending`: quando há mais operações pendentes do que isso, a requisição é recusada na hora com 503 em vez de ficar esperando e acumulando memória.
+    Com `max_workers=0` o trabalho vai para o threadpool padrão do event loop (útil em testes e ambientes sem suporte a multiprocessing).
+    """
+
+    def __init__(self, max_workers: int | None, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor | None:
+        if self.max_workers == 0:
+            return None
+
+        if self._executor is None:
+            # 'spawn' evita herdar via fork as threads do processo pai (event loop, driver do banco), o que pode travar os workers
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+        return self._executor
+
+    async def _submit(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail='Server busy, try again later', headers={'Retry-After': '1'})
+
+        self.pending += 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        return await self._submit(verify_and_update_password, plain_password, hashed_password)
+
+    def metrics(self) -> dict:
+        return {'workers': self.max_workers, 'pending': self.pending, 'max_pending': self.max_pending, 'rejected': self.rejected}
+
+    def shutdown(self):
+        """Encerra os processos do pool. Um novo pool é criado sob demanda se o serviço for usado de novo."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(max_workers=settings.PASSWORD_HASH_WORKERS, max_pending=settings.PASSWORD_HASH_MAX_PENDING)
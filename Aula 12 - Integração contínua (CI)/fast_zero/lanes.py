@@ -0,0 +1,48 @@
+from time import perf_counter
+
+import anyio
+
+from fast_zero.database import CheckoutWaitMetrics
+from fast_zero.settings import settings
+
+
+class Lane:
+    """
+    Faixa de execução isolada: limita quantas requisições de um router rodam ao mesmo tempo.
+
+    Usada como dependência do router (ex: `APIRouter(dependencies=[Depends(lanes['auth'])])`). Cada router tem o seu próprio limitador, então uma rajada de logins fica esperando na faixa de `auth` e não ocupa a capacidade reservada para as leituras de `todos`.
+    Como as dependências do router são resolvidas antes das dependências da rota, a vaga é obtida antes de abrir a sessão do banco.
+    """
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.limiter = anyio.CapacityLimiter(size)
+        self.wait = CheckoutWaitMetrics()
+
+    async def __call__(self):
+        start = perf_counter()
+        await self.limiter.acquire()
+        self.wait.record(perf_counter() - start)
+
+        try:
+            yield
+        finally:
+            self.limiter.release()
+
+    def metrics(self) -> dict:
+        return {
+            'name': self.name,
+            'size': int(self.limiter.total_tokens),
+            'in_use': self.limiter.borrowed_tokens,
+            'waiting': self.limiter.statistics().tasks_waiting,
+            'acquisitions': self.wait.count,
+            'wait_avg_ms': self.wait.total_seconds / self.wait.count * 1000 if self.wait.count else 0.0,
+            'wait_max_ms': self.wait.max_seconds * 1000,
+        }
+
+
+lanes = {
+    'auth': Lane('auth', settings.LANE_AUTH_SIZE),
+    'users': Lane('users', settings.LANE_USERS_SIZE),
+    'todos': Lane('todos', settings.LANE_TODOS_SIZE),
+}
@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import DDL, ForeignKey, Index, event, func, text
 from sqlalchemy.orm import Mapped, mapped_column, registry
 
 # Cria um registro para armazenar as classes de modelo (tabelas)
@@ -22,6 +22,11 @@ class User:
     """Modelo de usuário representando a tabela 'users' no banco de dados."""
 
     __tablename__ = 'users'  # Nome da tabela no banco de dados
+    # Busca os valores gerados pelo banco (id, created_at, updated_at) no próprio INSERT/UPDATE via RETURNING, dispensando o session.refresh(). Em bancos sem suporte a RETURNING o SQLAlchemy faz um SELECT automaticamente.
+    __mapper_args__ = {'eager_defaults': True}
+    # Índice funcional usado pelo login por email, que compara sem diferenciar maiúsculas de minúsculas.
+    # sqlite_autoincrement: sem AUTOINCREMENT o SQLite reaproveita o maior id depois de um DELETE, e o token (claim "uid") de um usuário removido passaria a valer para o próximo cadastro
+    __table_args__ = (Index('ix_users_email_lower', func.lower(text('email'))), {'sqlite_autoincrement': True})
 
     # Colunas da tabela:
     id: Mapped[int] = mapped_column(init=False, primary_key=True)  # ID autoincremental
@@ -44,6 +49,13 @@ class User:
 @table_registry.mapped_as_dataclass
 class Todo:
     __tablename__ = 'todos'
+    __mapper_args__ = {'eager_defaults': True}
+    # Índices que cobrem os filtros usados pelas rotas de tarefas: sempre pelo dono (user_id), quase sempre pelo estado, ordenando/buscando por id
+    __table_args__ = (
+        Index('ix_todos_user_id_id', 'user_id', 'id'),
+        Index('ix_todos_user_id_state_id', 'user_id', 'state', 'id'),
+        {'sqlite_autoincrement': True},  # Ids de tarefas removidas também não voltam a ser usados
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
@@ -52,3 +64,22 @@ class Todo:
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now(), onupdate=func.now())
+
+
+# Busca textual nas tarefas (parâmetro "q", ver fast_zero/search.py): no SQLite uma tabela virtual FTS5 mantida por triggers, no Postgres um índice GIN
+TODO_SEARCH_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE todos_fts USING fts5(title, description, content='todos', content_rowid='id')",
+    'CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END',
+    "CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN INSERT INTO todos_fts(todos_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); END",
+    'CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, description ON todos BEGIN '
+    "INSERT INTO todos_fts(todos_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+    'INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END',
+]
+TODO_SEARCH_POSTGRES_DDL = ["CREATE INDEX ix_todos_search ON todos USING GIN (to_tsvector('simple', title || ' ' || description))"]
+
+# Cria/remove as estruturas de busca junto com a tabela "todos" (metadata.create_all/drop_all). Ficam aqui, e não em fast_zero/search.py, para que qualquer create_all que importe os modelos já crie um banco onde a busca funciona
+for statement in TODO_SEARCH_SQLITE_DDL:
+    event.listen(Todo.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in TODO_SEARCH_POSTGRES_DDL:
+    event.listen(Todo.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+event.listen(Todo.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS todos_fts').execute_if(dialect='sqlite'))
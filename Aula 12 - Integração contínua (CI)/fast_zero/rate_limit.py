@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import math
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from time import monotonic, time
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import OAuth2PasswordRequestForm
+
+from fast_zero.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def take_token(tokens: float, updated_at: float, now: float, capacity: int, rate: float) -> tuple[float, float]:
+    """Repõe as fichas do balde desde `updated_at` e tenta consumir uma. Retorna (fichas restantes, segundos até a próxima ficha ou 0 se a tentativa foi permitida)."""
+    tokens = min(capacity, tokens + (now - updated_at) * rate)
+
+    if tokens < 1:
+        return tokens, (1 - tokens) / rate
+
+    return tokens - 1, 0.0
+
+
+class MemoryRateLimiter:
+    """
+    Token bucket em memória: cada chave tem um balde com até `capacity` fichas, repostas à taxa de `rate` fichas por segundo. Cada tentativa consome uma ficha.
+
+    O estado é do processo, então com vários workers do uvicorn cada um tem os seus baldes (o limite efetivo é multiplicado pelo número de workers).
+    Para compartilhar o estado entre workers use o backend 'sqlite' (mesma máquina) ou 'redis'.
+    Guarda no máximo `max_keys` baldes: os usados há mais tempo são descartados, o que só pode tornar o limite mais brando, nunca bloquear indevidamente.
+    """
+
+    backend = 'memory'
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def hit(self, key: str, capacity: int, rate: float) -> float:
+        """Consome uma ficha do balde da chave. Retorna 0 se a tentativa foi permitida ou, se não, quantos segundos faltam para a próxima ficha."""
+        now = monotonic()
+        tokens, retry_after = take_token(*self._buckets.pop(key, (capacity, now)), now, capacity, rate)
+        self._buckets[key] = (tokens, now)
+
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return retry_after
+
+    async def clear(self):
+        self._buckets.clear()
+
+
+class SqliteRateLimiter:
+    """
+    Token bucket guardado em um arquivo SQLite, compartilhado pelos workers da mesma máquina sem precisar de outro serviço.
+
+    Cada tentativa é uma transação `BEGIN IMMEDIATE` (lê e grava o balde com o arquivo travado para escrita), executada em uma thread para não bloquear o event loop.
+    O relógio é o de parede (time), o mesmo para todos os processos. Baldes que já estariam cheios de novo são apagados a cada `cleanup_every` tentativas.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path: str, cleanup_every: int = 1000):
+        self.path = path
+        self.cleanup_every = cleanup_every
+        self._hits = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, expires_at REAL NOT NULL)')
+
+    def _hit(self, key: str, capacity: int, rate: float) -> float:
+        with self._lock:
+            self._hits += 1
+            self._connection.execute('BEGIN IMMEDIATE')
+
+            try:
+                now = time()
+                row = self._connection.execute('SELECT tokens, updated_at FROM buckets WHERE key = ?', (key,)).fetchone()
+                tokens, retry_after = take_token(*(row or (capacity, now)), now, capacity, rate)
+                self._connection.execute(
+                    'INSERT INTO buckets VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at, expires_at = excluded.expires_at',
+                    (key, tokens, now, now + capacity / rate),
+                )
+
+                if self._hits % self.cleanup_every == 0:
+                    self._connection.execute('DELETE FROM buckets WHERE expires_at < ?', (now,))
+
+                self._connection.execute('COMMIT')
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+
+        return retry_after
+
+    async def hit(self, key: str, capacity: int, rate: float) -> float:
+        return await asyncio.to_thread(self._hit, key, capacity, rate)
+
+    async def clear(self):
+        await asyncio.to_thread(self._clear)
+
+    def _clear(self):
+        with self._lock:
+            self._connection.execute('DELETE FROM buckets')
+
+
+# Mesmo algoritmo do take_token, executado de forma atômica no Redis. O relógio é o do próprio Redis, para que todos os workers concordem
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated_at) * rate)
+local retry_after = 0
+if tokens < 1 then
+    retry_after = (1 - tokens) / rate
+else
+    tokens = tokens - 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate))
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimiter:
+    """
+    Token bucket guardado no Redis (ou em qualquer servidor compatível com o protocolo, como Valkey ou KeyDB rodando na própria máquina), compartilhado por todos os workers.
+
+    Requer o pacote `redis` instalado. Cada balde expira sozinho quando ficaria cheio de novo, então chaves abandonadas não acumulam.
+    """
+
+    backend = 'redis'
+    prefix = 'fast_zero:rate:'
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis  # noqa: PLC0415 - Dependência opcional, só é necessária com este backend
+        except ImportError as error:  # pragma: no cover
+            raise RuntimeError("LOGIN_RATE_LIMIT_BACKEND='redis' requires the 'redis' package") from error
+
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def hit(self, key: str, capacity: int, rate: float) -> float:
+        return float(await self.script(keys=[self.prefix + key], args=[capacity, rate]))
+
+    async def clear(self):
+        async for key in self.client.scan_iter(f'{self.prefix}*'):
+            await self.client.delete(key)
+
+
+def create_rate_limiter() -> MemoryRateLimiter | SqliteRateLimiter | RedisRateLimiter:
+    if settings.LOGIN_RATE_LIMIT_BACKEND == 'redis':
+        return RedisRateLimiter(settings.LOGIN_RATE_LIMIT_REDIS_URL)
+
+    if settings.LOGIN_RATE_LIMIT_BACKEND == 'sqlite':
+        return SqliteRateLimiter(settings.LOGIN_RATE_LIMIT_SQLITE_PATH)
+
+    return MemoryRateLimiter()
+
+
+rate_limiter = create_rate_limiter()
+
+
+def configured_workers(argv: list[str] | None = None) -> int:
+    """
+    Número de workers com que o servidor foi iniciado: `--workers N` (uvicorn) ou `-w N` (gunicorn) na linha de comando, senão WEB_CONCURRENCY, senão 1.
+
+    Os workers do uvicorn são iniciados com multiprocessing (spawn), que repassa o sys.argv do processo principal, então a linha de comando é visível em cada um deles.
+    """
+    argv = sys.argv if argv is None else argv
+
+    for index, arg in enumerate(argv):
+        if arg.startswith('--workers='):
+            return int(arg.split('=', 1)[1])
+
+        if arg in {'--workers', '-w'} and index + 1 < len(argv):
+            return int(argv[index + 1])
+
+    return int(os.environ.get('WEB_CONCURRENCY', '1'))
+
+
+def warn_if_rate_limit_is_per_worker():
+    """Avisa na subida da aplicação quando o backend 'memory' roda com mais de um worker: cada um teria os seus baldes e o limite valeria N vezes mais."""
+    workers = configured_workers()
+
+    if rate_limiter.backend == 'memory' and workers > 1:
+        logger.warning(
+            "LOGIN_RATE_LIMIT_BACKEND='memory' keeps the login rate limit per process: with %d workers each client gets %d times the configured attempts. "
+            "Use LOGIN_RATE_LIMIT_BACKEND='sqlite' (shared by the workers on this host) or 'redis'.",
+            workers,
+            workers,
+        )
+
+
+async def login_rate_limit(request: Request, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
+    """
+    Limita as tentativas de login por IP do cliente e pelo username informado, respondendo 429 quando algum dos baldes está vazio.
+
+    É uma dependência da rota, então roda antes do corpo do login: uma tentativa recusada não chega a consultar o banco nem a calcular o Argon2.
+    """
+    # Sem endereço do cliente (ex: uvicorn ouvindo em um socket unix) todas as tentativas dividem um balde fixo
+    client_host = request.client.host if request.client else 'unknown'
+    checks = (
+        (f'ip:{client_host}', settings.LOGIN_RATE_LIMIT_IP_CAPACITY, settings.LOGIN_RATE_LIMIT_IP_PER_SECOND),
+        (f'username:{form_data.username.lower()}', settings.LOGIN_RATE_LIMIT_USERNAME_CAPACITY, settings.LOGIN_RATE_LIMIT_USERNAME_PER_SECOND),
+    )
+
+    for key, capacity, rate in checks:
+        retry_after = await rate_limiter.hit(key, capacity, rate)
+
+        if retry_after:
+            raise HTTPException(
+                status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                detail='Too many login attempts, try again later',
+                headers={'Retry-After': str(math.ceil(retry_after))},
+            )
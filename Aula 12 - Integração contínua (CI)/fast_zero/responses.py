@@ -0,0 +1,41 @@
+"""
+Serialização rápida das respostas JSON.
+
+- ORJSONResponse é a classe de resposta padrão da aplicação: o dicionário que o FastAPI monta a partir do response_model é codificado pelo orjson em vez do json da biblioteca padrão.
+- Nas listagens, que são as respostas grandes, a rota devolve um SchemaListResponse: as linhas são validadas uma única vez por um TypeAdapter já compilado e codificadas direto para bytes JSON pelo pydantic-core.
+  O caminho normal do FastAPI valida as linhas, converte os modelos de volta para dicionários e só então os codifica.
+"""
+
+from http import HTTPStatus
+
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import Row
+from starlette.responses import Response
+
+from fast_zero.schemas import TodoPublicSchema, UserPublicSchema
+
+todo_list_adapter = TypeAdapter(list[TodoPublicSchema])
+user_list_adapter = TypeAdapter(list[UserPublicSchema])
+
+
+class SchemaListResponse(Response):
+    """
+    Resposta JSON de uma lista já serializada pelo TypeAdapter. Aceita objetos do ORM ou linhas da projeção (from_attributes).
+
+    Como a rota retorna a resposta pronta, o FastAPI não aplica o response_model, que continua declarado só para a documentação (OpenAPI).
+    Headers como o "X-Next-Cursor" vão nesta resposta, não no Response injetado na rota, que é descartado.
+    """
+
+    media_type = 'application/json'
+
+    def __init__(self, adapter: TypeAdapter, items, status_code: int = HTTPStatus.OK, headers: dict | None = None):
+        if items and isinstance(items[0], Row):
+            # Ler cada coluna como atributo da Row é mais lento do que percorrê-la como tupla, então as linhas viram dicionários antes da validação
+            fields = items[0]._fields
+            items = [dict(zip(fields, row)) for row in items]
+
+        super().__init__(adapter.dump_json(adapter.validate_python(items, from_attributes=True)), status_code, headers)
+
+
+__all__ = ['ORJSONResponse', 'SchemaListResponse', 'todo_list_adapter', 'user_list_adapter']
@@ -1,42 +1,118 @@
+from collections.abc import Callable
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, func, literal, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from fast_zero.database import get_session
+from fast_zero.database import get_primary_session, get_session_factory
+from fast_zero.hashing import password_hasher
+from fast_zero.lanes import lanes
 from fast_zero.models import User
+from fast_zero.rate_limit import login_rate_limit
 from fast_zero.schemas import TokenSchema
-from fast_zero.security import create_access_token, get_current_user, verify_password
+from fast_zero.security import create_access_token, get_current_user
+from fast_zero.tokens import token_engine
+from fast_zero.user_cache import CachedUser
+from fast_zero.utils import release_connection
 
-router = APIRouter(prefix='/auth', tags=['auth'])
-T_Session = Annotated[Session, Depends(get_session)]
+router = APIRouter(prefix='/auth', tags=['auth'], dependencies=[Depends(lanes['auth'])])
+# Login logo após o cadastro é o fluxo mais comum de leitura após escrita: uma réplica atrasada ainda não teria o usuário
+T_PrimarySession = Annotated[AsyncSession, Depends(get_primary_session)]
+T_SessionFactory = Annotated[Callable[[], AsyncSession], Depends(get_session_factory)]
 T_OAuthForm = Annotated[OAuth2PasswordRequestForm, Depends()]
-T_CurrentUser = Annotated[User, Depends(get_current_user)]
+T_CurrentUser = Annotated[CachedUser, Depends(get_current_user)]
 
 
-@router.post('/token', response_model=TokenSchema)
-def login_for_access_token(
-    session: T_Session,
+# Ordem de preferência das buscas do login por email (coluna "rank" do UNION ALL)
+EXACT_EMAIL, LOWER_EMAIL, USERNAME = 0, 1, 2
+
+_ranked = union_all(
+    select(User, literal(EXACT_EMAIL).label('rank')).where(User.email == bindparam('login')),
+    select(User, literal(LOWER_EMAIL).label('rank')).where(func.lower(User.email) == func.lower(bindparam('login'))),
+    select(User, literal(USERNAME).label('rank')).where(User.username == bindparam('login')),
+).subquery()
+# Montada uma vez só: gerar as colunas do subquery a cada login custava mais que a própria consulta. Linhas (usuário, rank) para o parâmetro "login"
+LOGIN_LOOKUP_QUERY = select(aliased(User, _ranked), _ranked.c.rank)
+
+
+async def get_user_by_login(login: str, session: AsyncSession) -> User | None:
+    """
+    Busca o usuário pelo email ou pelo username informado no login.
+
+    Um único `username = x OR email = x` impede que alguns planejadores usem um índice só (vira BitmapOr ou varredura da tabela).
+    Valores sem '@' só podem ser username. Com '@' as três buscas vão em um único UNION ALL, cada parte usando o seu índice, e a coluna "rank" diz de qual parte veio cada linha:
+
+    - Email exatamente como digitado (índice único de email).
+    - Email sem diferenciar maiúsculas (índice em lower(email)). A unicidade do email diferencia maiúsculas, então aqui podem existir duas contas (ex: Bob@example.com e bob@example.com);
+      nesse caso nenhuma é escolhida, para não verificar a senha contra o usuário errado, e cada um entra pelo email exato.
+    - Username, já que usernames também podem conter '@'.
+
+    Assim um login que não existe (o caso comum em ataques de credential stuffing) custa uma ida ao banco, não três.
+    """
+    if '@' not in login:
+        return await session.scalar(select(User).where(User.username == login))
+
+    matches: dict[int, list[User]] = {}
+
+    for user, rank in await session.execute(LOGIN_LOOKUP_QUERY, {'login': login}):
+        matches.setdefault(rank, []).append(user)
+
+    if EXACT_EMAIL in matches:
+        return matches[EXACT_EMAIL][0]
+
+    if len(matches.get(LOWER_EMAIL, [])) == 1:
+        return matches[LOWER_EMAIL][0]
+
+    return matches.get(USERNAME, [None])[0]
+
+
+async def rehash_password(user_id: int, old_hash: str, new_hash: str, session_factory):
+    """Grava o hash refeito com os parâmetros atuais do Argon2. O filtro pelo hash antigo evita sobrescrever uma troca de senha feita nesse meio tempo."""
+    async with session_factory() as session:
+        await session.execute(update(User).where(User.id == user_id, User.password == old_hash).values(password=new_hash))
+        await session.commit()
+
+
+@router.post('/token', response_model=TokenSchema, dependencies=[Depends(login_rate_limit)])
+async def login_for_access_token(
+    session: T_PrimarySession,
     form_data: T_OAuthForm,
+    background_tasks: BackgroundTasks,
+    session_factory: T_SessionFactory,
 ):
-    user = session.scalar(select(User).where((User.username == form_data.username) | (User.email == form_data.username)))
+    user = await get_user_by_login(form_data.username, session)
+    await release_connection(session)  # Nada mais é lido do banco: a conexão não precisa ficar emprestada durante a verificação
 
-    if not user or not verify_password(form_data.password, user.password):
+    # A verificação do hash é custosa (CPU), então roda no pool de processos para não disputar o GIL com as outras requisições
+    valid, new_hash = await password_hasher.verify_and_update(form_data.password, user.password) if user else (False, None)
+
+    if not valid:
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Incorrect email or password',
         )
 
-    access_token = create_access_token(data_payload={'sub': user.email})
+    # Hash gerado com parâmetros antigos: o novo é gravado depois que a resposta for enviada, sem atrasar o login
+    if new_hash:
+        background_tasks.add_task(rehash_password, user.id, user.password, new_hash, session_factory)
+
+    access_token = create_access_token(data_payload={'sub': user.email, 'uid': user.id})
 
     return {'access_token': access_token, 'token_type': 'Bearer'}
 
 
 @router.post('/refresh-token', response_model=TokenSchema)
-def refresh_token(user: T_CurrentUser):
-    new_access_token = create_access_token(data_payload={'sub': user.email})
+async def refresh_token(user: T_CurrentUser):
+    new_access_token = create_access_token(data_payload={'sub': user.email, 'uid': user.id})
 
     return {'access_token': new_access_token, 'token_type': 'Bearer'}
+
+
+@router.get('/jwks.json')
+async def jwks():
+    """Chaves públicas (JWKS) para que outros serviços verifiquem os tokens localmente. Vazio quando o algoritmo é HMAC."""
+    return token_engine.jwks()
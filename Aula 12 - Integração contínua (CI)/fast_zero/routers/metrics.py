@@ -0,0 +1,46 @@
+from fastapi import APIRouter
+
+from fast_zero.database import engine, get_pool_metrics, replicas
+from fast_zero.hashing import password_hasher
+from fast_zero.lanes import lanes
+from fast_zero.schemas import LaneMetricsSchema, PasswordHasherMetricsSchema, PoolMetricsSchema, TokenCacheMetricsSchema, UserCacheMetricsSchema
+from fast_zero.tokens import token_engine
+from fast_zero.user_cache import user_cache
+
+router = APIRouter(prefix='/metrics', tags=['metrics'])
+
+
+@router.get('/pool', response_model=PoolMetricsSchema)
+async def pool_metrics():
+    """Retorna o uso atual do pool de conexões do banco (conexões em uso, ociosas, overflow e tempo de espera no checkout)."""
+    return get_pool_metrics(engine)
+
+
+@router.get('/pool/replicas', response_model=list[PoolMetricsSchema])
+async def replica_pool_metrics():
+    """Retorna o uso do pool de conexões de cada réplica de leitura configurada."""
+    return [get_pool_metrics(replica) for replica in replicas.engines]
+
+
+@router.get('/password-hasher', response_model=PasswordHasherMetricsSchema)
+async def password_hasher_metrics():
+    """Retorna o estado do pool de processos de hash de senhas (operações pendentes e requisições recusadas por fila cheia)."""
+    return password_hasher.metrics()
+
+
+@router.get('/lanes', response_model=list[LaneMetricsSchema])
+async def lane_metrics():
+    """Retorna a ocupação e o tempo de espera na fila de cada faixa de execução (auth, users, todos)."""
+    return [lane.metrics() for lane in lanes.values()]
+
+
+@router.get('/user-cache', response_model=UserCacheMetricsSchema)
+async def user_cache_metrics():
+    """Retorna acertos e erros do cache do usuário autenticado."""
+    return user_cache.metrics()
+
+
+@router.get('/token-cache', response_model=TokenCacheMetricsSchema | None)
+async def token_cache_metrics():
+    """Retorna acertos e erros do cache de tokens já verificados (null quando o cache está desativado)."""
+    return token_engine.cache.metrics() if token_engine.cache else None
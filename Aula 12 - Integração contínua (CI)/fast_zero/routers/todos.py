@@ -1,39 +1,105 @@
+import csv
+import io
+from contextlib import asynccontextmanager
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Any, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+import orjson
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from fast_zero.database import get_session
-from fast_zero.models import Todo, User
-from fast_zero.schemas import FilterTodo, TodoPublicSchema, TodoSchema, TodoUpdateSchema
-from fast_zero.security import get_current_user
+from fast_zero.database import get_primary_session, get_session
+from fast_zero.lanes import lanes
+from fast_zero.models import Todo
+from fast_zero.responses import SchemaListResponse, todo_list_adapter
+from fast_zero.schemas import BulkResultSchema, FilterTodo, FilterTodoBulk, TodoBulkCreatedSchema, TodoBulkStateSchema, TodoPublicSchema, TodoSchema, TodoUpdateSchema
+from fast_zero.search import search_todos
+from fast_zero.security import get_current_user_id
+from fast_zero.settings import settings
+from fast_zero.utils import columns_for, paginate, set_next_cursor
 
-router = APIRouter(prefix='/todos', tags=['todos'])
-T_Session = Annotated[Session, Depends(get_session)]
-T_CurrentUser = Annotated[User, Depends(get_current_user)]
+router = APIRouter(prefix='/todos', tags=['todos'], dependencies=[Depends(lanes['todos'])])
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_PrimarySession = Annotated[AsyncSession, Depends(get_primary_session)]  # Rotas que alteram tarefas (ver get_primary_session)
+T_CurrentUserId = Annotated[int, Depends(get_current_user_id)]  # As rotas de tarefas só precisam do id, que vem do próprio token
 T_FilterTodo = Annotated[FilterTodo, Query()]
+T_FilterTodoBulk = Annotated[FilterTodoBulk, Query()]
+
+
+@asynccontextmanager
+async def owner_must_exist(session: AsyncSession):
+    """
+    Envolve os INSERTs de tarefas. O id do dono vem do token (get_current_user_id), sem consultar o banco, então o usuário pode ter sido removido depois que o token foi emitido.
+
+    No Postgres a chave estrangeira recusa a tarefa e o IntegrityError vira 401, como o get_current_user responderia. O SQLite só verifica chaves estrangeiras com PRAGMA foreign_keys = ON; sem ele a tarefa é gravada sem dono até o token expirar.
+    """
+    try:
+        yield
+    except IntegrityError as error:
+        await session.rollback()
+        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail='Could not validate credentials', headers={'WWW-Authenticate': 'Bearer'}) from error
 
 
 @router.post('', response_model=TodoPublicSchema, status_code=HTTPStatus.CREATED)
-def create_todo(todo: TodoSchema, user: T_CurrentUser, session: T_Session):
+async def create_todo(todo: TodoSchema, user_id: T_CurrentUserId, session: T_PrimarySession):
     db_todo = Todo(
         title=todo.title,
         description=todo.description,
         state=todo.state,
-        user_id=user.id,
+        user_id=user_id,
     )
     session.add(db_todo)
-    session.commit()
-    session.refresh(db_todo)
+
+    async with owner_must_exist(session):
+        await session.commit()
 
     return db_todo
 
 
+@router.post('/bulk', response_model=TodoBulkCreatedSchema, status_code=HTTPStatus.CREATED)
+async def create_todos_bulk(todos: Annotated[list[Any], Body()], user_id: T_CurrentUserId, session: T_PrimarySession):
+    """
+    Cria várias tarefas em uma única chamada.
+
+    Cada item é validado individualmente: se algum for inválido nada é gravado e a resposta (422) lista os erros com o índice de cada item. Os itens válidos são inseridos com um único INSERT de várias linhas (insertmanyvalues) dentro de uma transação.
+    """
+    if len(todos) > settings.TODO_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            detail=f'A maximum of {settings.TODO_BULK_MAX_ITEMS} todos can be created per request',
+        )
+
+    values, errors = [], []
+
+    for index, item in enumerate(todos):
+        try:
+            values.append({**TodoSchema.model_validate(item).model_dump(), 'user_id': user_id})
+        except ValidationError as error:
+            errors.append({'index': index, 'errors': error.errors(include_url=False, include_context=False)})
+
+    if errors:
+        raise HTTPException(status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=errors)
+
+    if not values:
+        return {'ids': []}
+
+    async with owner_must_exist(session):
+        ids = await session.scalars(insert(Todo).returning(Todo.id), values)
+        # Os ids são gerados na ordem das linhas do INSERT, mas o RETURNING não garante essa ordem. Ordená-los devolve os ids na ordem dos itens enviados (sort_by_parameter_order faria o SQLite executar um INSERT por item)
+        ids = sorted(ids.all())
+        await session.commit()
+
+    return {'ids': ids}
+
+
 @router.get('', response_model=list[TodoPublicSchema])
-def list_todos(session: T_Session, user: T_CurrentUser, filter_todo: T_FilterTodo):
-    query = select(Todo).where(Todo.user_id == user.id)
+async def list_todos(session: T_Session, user_id: T_CurrentUserId, filter_todo: T_FilterTodo):
+    # Projeção: só as colunas de TodoPublicSchema, em linhas leves que não passam pelo identity map da sessão
+    query = select(*columns_for(TodoPublicSchema, Todo)).where(Todo.user_id == user_id)
 
     if filter_todo.title:
         query = query.filter(Todo.title.contains(filter_todo.title))
@@ -44,35 +110,148 @@ def list_todos(session: T_Session, user: T_CurrentUser, filter_todo: T_FilterTod
     if filter_todo.state:
         query = query.filter(Todo.state == filter_todo.state)
 
-    todos = session.scalars(query.offset(filter_todo.skip).limit(filter_todo.limit)).all()
+    if filter_todo.q:
+        # Na busca a ordem é por relevância, então a paginação por cursor (que depende da ordem por id) não se aplica
+        if filter_todo.cursor:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Cursor pagination is not supported with q')
+
+        query = search_todos(query, filter_todo.q, session.get_bind().dialect.name)
+
+    todos = (await session.execute(paginate(query, Todo, filter_todo))).all()
+    response = SchemaListResponse(todo_list_adapter, todos)
+
+    if not filter_todo.q:
+        set_next_cursor(response, todos, filter_todo.limit)
+
+    return response
+
+
+EXPORT_COLUMNS = (Todo.id, Todo.title, Todo.description, Todo.state, Todo.created_at, Todo.updated_at)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+
+def encode_export_rows(rows, export_format: str) -> str | bytes:
+    """Converte um lote de linhas para NDJSON (um objeto JSON por linha, com datas em ISO-8601 como no resto da API) ou CSV."""
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    return b''.join(orjson.dumps(dict(row._mapping), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_todos(session: T_Session, user_id: T_CurrentUserId, format: Literal['ndjson', 'csv'] = 'ndjson'):
+    """
+    Exporta todas as tarefas do usuário em streaming (NDJSON ou CSV).
+
+    As linhas são lidas do banco com um cursor do lado do servidor, em lotes de TODO_EXPORT_BATCH_SIZE, e enviadas conforme chegam, então o uso de memória não cresce com a quantidade de tarefas.
+    """
+    query = select(*EXPORT_COLUMNS).where(Todo.user_id == user_id).order_by(Todo.id).execution_options(yield_per=settings.TODO_EXPORT_BATCH_SIZE)
+
+    async def content():
+        # A dependência get_session é finalizada antes do corpo da resposta ser enviado, então a sessão reabre a conexão aqui e é fechada ao final do streaming
+        try:
+            if format == 'csv':
+                yield encode_export_rows([EXPORT_FIELDS], format)
+
+            result = await session.stream(query)
 
-    return todos
+            async for rows in result.partitions():
+                yield encode_export_rows(rows, format)
+        finally:
+            await session.close()
+
+    media_type = 'text/csv' if format == 'csv' else 'application/x-ndjson'
+
+    return StreamingResponse(content(), media_type=media_type, headers={'Content-Disposition': f'attachment; filename="todos.{format}"'})
+
+
+def bulk_conditions(filter_todo: FilterTodoBulk, user_id: int) -> list:
+    """Monta o WHERE das operações em massa, sempre restrito às tarefas do usuário."""
+    conditions = []
+
+    if filter_todo.ids is not None:
+        conditions.append(Todo.id.in_(filter_todo.ids))
+
+    if filter_todo.title:
+        conditions.append(Todo.title.contains(filter_todo.title))
+
+    if filter_todo.state:
+        conditions.append(Todo.state == filter_todo.state)
+
+    # Exigir um filtro evita que uma chamada sem parâmetros afete todas as tarefas do usuário por engano
+    if not conditions:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='At least one filter is required')
+
+    return [Todo.user_id == user_id, *conditions]
+
+
+@router.patch('/bulk', response_model=BulkResultSchema)
+async def patch_todos_state_bulk(todos: TodoBulkStateSchema, session: T_PrimarySession, user_id: T_CurrentUserId):
+    """Muda o estado de todas as tarefas que atendem ao filtro com um único UPDATE (ex: mover todas as 'done' para 'trash')."""
+    if todos.ids == []:  # Uma lista de ids vazia seleciona nenhuma tarefa, não "todas"
+        return {'affected': 0}
+
+    query = update(Todo).where(*bulk_conditions(todos, user_id)).values(state=todos.new_state).execution_options(synchronize_session=False)
+    result = await session.execute(query)
+    await session.commit()
+
+    return {'affected': result.rowcount}
+
+
+@router.delete('/bulk', response_model=BulkResultSchema)
+async def delete_todos_bulk(filter_todo: T_FilterTodoBulk, session: T_PrimarySession, user_id: T_CurrentUserId):
+    """
+    Apaga todas as tarefas que atendem ao filtro (ex: esvaziar a lixeira com state=trash).
+
+    A remoção é feita em lotes de TODO_BULK_DELETE_CHUNK_SIZE linhas, cada um em sua própria transação, para que uma limpeza grande não segure locks na tabela durante todo o processo.
+    """
+    if filter_todo.ids == []:
+        return {'affected': 0}
+
+    chunk_size = settings.TODO_BULK_DELETE_CHUNK_SIZE
+    chunk = select(Todo.id).where(*bulk_conditions(filter_todo, user_id)).order_by(Todo.id).limit(chunk_size)
+    query = delete(Todo).where(Todo.id.in_(chunk)).execution_options(synchronize_session=False)
+    affected = 0
+
+    while True:
+        result = await session.execute(query)
+        await session.commit()
+        affected += result.rowcount
+
+        if result.rowcount < chunk_size:
+            break
+
+    return {'affected': affected}
 
 
 @router.delete('/{todo_id}', status_code=HTTPStatus.NO_CONTENT)
-def delete_todo(todo_id: int, session: T_Session, user: T_CurrentUser):
-    todo = session.scalar(select(Todo).where(Todo.id == todo_id, Todo.user_id == user.id))
+async def delete_todo(todo_id: int, session: T_PrimarySession, user_id: T_CurrentUserId):
+    # Um único DELETE já filtrando pelo dono, sem carregar a tarefa antes. Se nenhuma linha foi afetada a tarefa não existe (ou é de outro usuário)
+    result = await session.execute(delete(Todo).where(Todo.id == todo_id, Todo.user_id == user_id))
 
-    if not todo:
+    if not result.rowcount:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Task not found.')
 
-    session.delete(todo)
-    session.commit()
+    await session.commit()
 
 
 @router.patch('/{todo_id}', response_model=TodoPublicSchema)
-def patch_todo(todo_id: int, todo: TodoUpdateSchema, session: T_Session, user: T_CurrentUser):
-    db_todo = session.scalar(select(Todo).where(Todo.id == todo_id, Todo.user_id == user.id))
+async def patch_todo(todo_id: int, todo: TodoUpdateSchema, session: T_PrimarySession, user_id: T_CurrentUserId):
+    # "exclude_unset=True", faz com que o dicionario retornado já exclua os campos com o valor igual a None
+    values = todo.model_dump(exclude_unset=True)
+    where = (Todo.id == todo_id, Todo.user_id == user_id)
+
+    if values:
+        # UPDATE ... RETURNING: atualiza e devolve a tarefa atualizada em uma única ida ao banco
+        db_todo = await session.scalar(update(Todo).where(*where).values(**values).returning(Todo))
+    else:
+        db_todo = await session.scalar(select(Todo).where(*where))
 
     if not db_todo:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Task not found.')
 
-    # "exclude_unset=True", faz com que o dicionario retornado já exclua os campos com o valor igual a None
-    for key, value in todo.model_dump(exclude_unset=True).items():
-        setattr(db_todo, key, value)
-
-    session.add(db_todo)
-    session.commit()
-    session.refresh(db_todo)
+    await session.commit()
 
     return db_todo
@@ -2,18 +2,23 @@ from http import HTTPStatus
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Query, responses
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from fast_zero.database import get_session
+from fast_zero.database import get_primary_session, get_session
+from fast_zero.hashing import password_hasher
+from fast_zero.lanes import lanes
 from fast_zero.models import User
-from fast_zero.schemas import FilterPage, UserPublicSchema, UserSchema
-from fast_zero.security import get_current_user, get_password_hash
-from fast_zero.utils import get_object_or_404, validate_username_or_email
-
-router = APIRouter(prefix='/users', tags=['users'])
-T_Session = Annotated[Session, Depends(get_session)]
-T_CurrentUser = Annotated[User, Depends(get_current_user)]
+from fast_zero.responses import SchemaListResponse, user_list_adapter
+from fast_zero.schemas import FilterPage, UserPublicSchema, UserSchema, UserUpdateSchema
+from fast_zero.security import get_current_user
+from fast_zero.user_cache import CachedUser, user_cache
+from fast_zero.utils import columns_for, get_object_or_404, insert_ignoring_conflicts, paginate, raise_registration_conflict, release_connection, set_next_cursor, validate_username_or_email
+
+router = APIRouter(prefix='/users', tags=['users'], dependencies=[Depends(lanes['users'])])
+T_Session = Annotated[AsyncSession, Depends(get_session)]
+T_PrimarySession = Annotated[AsyncSession, Depends(get_primary_session)]  # Rotas que escrevem: todas as consultas vão ao banco principal, nunca a uma réplica
+T_CurrentUser = Annotated[CachedUser, Depends(get_current_user)]
 T_FilterPage = Annotated[FilterPage, Query()]  # A junção do modelo "FilterPage" com o objeto "Query()" do FastAPI, faz com que os atributos do modelo "FilterPage" virem QueryParams do endpoint
 
 
@@ -23,53 +28,89 @@ T_FilterPage = Annotated[FilterPage, Query()]  # A junção do modelo "FilterPag
     response_class=responses.JSONResponse,
     response_model=UserPublicSchema,
 )
-def create_user(user: UserSchema, session: T_Session):
-    """Cria um novo usuário e retorna o usuário criado."""
-    validate_username_or_email(username=user.username, email=user.email, session=session)
+async def create_user(user: UserSchema, session: T_PrimarySession):
+    """
+    Cria um novo usuário e retorna o usuário criado.
 
-    db_user = User(
-        email=user.email,
-        username=user.username,
-        password=get_password_hash(user.password),
-    )
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    O hash é feito antes de qualquer acesso ao banco e o cadastro é um único `INSERT ... ON CONFLICT DO NOTHING RETURNING`: as restrições únicas de username e email decidem se o usuário já existe.
+    Isso poupa o SELECT de validação e elimina a corrida entre dois cadastros simultâneos com o mesmo username/email. Só quando há conflito uma consulta a mais descobre qual campo está duplicado.
+    """
+    password = await password_hasher.hash(user.password)
+
+    query = insert_ignoring_conflicts(User, session.get_bind().dialect.name).values(username=user.username, email=user.email, password=password).returning(User)
+    db_user = await session.scalar(query)
+
+    if db_user is None:
+        await session.rollback()
+        await raise_registration_conflict(user.username, session)
+
+    await session.commit()
 
     return db_user  # Retorna o usuário criado
 
 
 @router.get('', status_code=HTTPStatus.OK, response_model=list[UserPublicSchema])
-def list_users(session: T_Session, filter_page: T_FilterPage):
+async def list_users(session: T_Session, filter_page: T_FilterPage):
     """Retorna uma lista de usuários com paginação."""
-    users = session.scalars(select(User).offset(filter_page.skip).limit(filter_page.limit)).all()
-    return users
+    users = (await session.execute(paginate(select(*columns_for(UserPublicSchema, User)), User, filter_page))).all()
+    response = SchemaListResponse(user_list_adapter, users)
+    set_next_cursor(response, users, filter_page.limit)
+
+    return response
 
 
 @router.put('', response_model=UserPublicSchema)
-def update_user(user: UserSchema, session: T_Session, current_user: T_CurrentUser):
+async def update_user(user: UserSchema, session: T_PrimarySession, current_user: T_CurrentUser):
     """Atualiza um usuário existente"""
-    validate_username_or_email(
+    await validate_username_or_email(
         username=user.username,
         email=user.email,
         session=session,
         user_id=current_user.id,  # Para excluir o usuário que está sendo atualizado na hora de verificar se já tem um usuário registrado com o esse username ou email.
     )
 
-    current_user.username = user.username
-    current_user.email = user.email
-    current_user.password = get_password_hash(user.password)
-    session.commit()
-    session.refresh(current_user)
+    await release_connection(session)  # Sem conexão emprestada durante o hash
+    password = await password_hasher.hash(user.password)
 
-    return current_user
+    db_user = await session.scalar(update(User).where(User.id == current_user.id).values(username=user.username, email=user.email, password=password).returning(User))
+    await session.commit()
+    await user_cache.invalidate(current_user.email)  # O token atual tem o email antigo como "sub"
+
+    return db_user
+
+
+@router.patch('', response_model=UserPublicSchema)
+async def patch_user(user: UserUpdateSchema, session: T_PrimarySession, current_user: T_CurrentUser):
+    """
+    Atualiza apenas os campos enviados do usuário autenticado.
+
+    Username e email iguais aos atuais são ignorados, então a verificação de unicidade só consulta os campos que realmente mudam. O hash Argon2 só é feito quando uma nova senha é enviada.
+    """
+    # "exclude_none=True" descarta tanto os campos não enviados quanto os enviados como null (username e email não podem ser nulos)
+    values = {field: value for field, value in user.model_dump(exclude_none=True).items() if field == 'password' or value != getattr(current_user, field)}
+
+    await validate_username_or_email(username=values.get('username'), email=values.get('email'), session=session, user_id=current_user.id)
+
+    if 'password' in values:
+        await release_connection(session)  # Sem conexão emprestada durante o hash
+        values['password'] = await password_hasher.hash(values['password'])
+
+    if not values:
+        return current_user
+
+    db_user = await session.scalar(update(User).where(User.id == current_user.id).values(**values).returning(User))
+    await session.commit()
+    await user_cache.invalidate(current_user.email)
+
+    return db_user
 
 
 @router.delete('', status_code=HTTPStatus.NO_CONTENT)
-def delete_user(session: T_Session, current_user: T_CurrentUser):
+async def delete_user(session: T_PrimarySession, current_user: T_CurrentUser):
     """Deleta um usuário existente"""
-    session.delete(current_user)
-    session.commit()
+    await session.execute(delete(User).where(User.id == current_user.id))
+    await session.commit()
+    await user_cache.invalidate(current_user.email)
 
 
 @router.get(
@@ -77,8 +118,8 @@ def delete_user(session: T_Session, current_user: T_CurrentUser):
     status_code=HTTPStatus.OK,
     response_model=UserPublicSchema,
 )
-def detail_user(user_id: int, session: T_Session):
+async def detail_user(user_id: int, session: T_Session):
     """Retorna os detalhes de um usuário específico."""
-    db_user = get_object_or_404(model=User, obj_id=user_id, session=session, detail='User not found')
+    db_user = await get_object_or_404(model=User, obj_id=user_id, session=session, detail='User not found', columns=columns_for(UserPublicSchema, User))
 
     return db_user
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from typing import Annotated
+
+from pydantic import BaseModel, EmailStr, StringConstraints
 
 from fast_zero.models import TodoState
 
@@ -13,6 +15,12 @@ class UserSchema(BaseModel):
     password: str
 
 
+class UserUpdateSchema(BaseModel):
+    username: str | None = None
+    email: EmailStr | None = None
+    password: str | None = None
+
+
 class UserPublicSchema(BaseModel):
     id: int
     username: str
@@ -38,6 +46,7 @@ class TokenSchema(BaseModel):
 class FilterPage(BaseModel):
     skip: int = 0
     limit: int = 100
+    cursor: str | None = None  # Token opaco retornado no header "X-Next-Cursor" da página anterior (quando informado, o "skip" é ignorado)
 
 
 class TodoSchema(BaseModel):
@@ -53,6 +62,10 @@ class TodoPublicSchema(BaseModel):
     state: TodoState
 
 
+class TodoBulkCreatedSchema(BaseModel):
+    ids: list[int]
+
+
 class TodoUpdateSchema(BaseModel):
     title: str | None = None
     description: str | None = None
@@ -63,3 +76,63 @@ class FilterTodo(FilterPage):
     title: str | None = None
     description: str | None = None
     state: TodoState | None = None
+    # Busca textual no título e na descrição, com resultados ordenados por relevância. Só com espaços fica vazio, e a listagem segue sem busca
+    q: Annotated[str, StringConstraints(strip_whitespace=True)] | None = None
+
+
+class PoolMetricsSchema(BaseModel):
+    pool_class: str
+    size: int | None = None
+    checked_out: int | None = None
+    idle: int | None = None
+    overflow: int | None = None
+    checkouts: int | None = None
+    checkout_wait_avg_ms: float | None = None
+    checkout_wait_max_ms: float | None = None
+    checkout_hold_avg_ms: float | None = None
+    checkout_hold_max_ms: float | None = None
+
+
+class PasswordHasherMetricsSchema(BaseModel):
+    workers: int | None
+    pending: int
+    max_pending: int
+    rejected: int
+
+
+class LaneMetricsSchema(BaseModel):
+    name: str
+    size: int
+    in_use: int
+    waiting: int
+    acquisitions: int
+    wait_avg_ms: float
+    wait_max_ms: float
+
+
+class UserCacheMetricsSchema(BaseModel):
+    backend: str
+    size: int | None
+    hits: int
+    misses: int
+
+
+class TokenCacheMetricsSchema(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+
+
+class FilterTodoBulk(BaseModel):
+    ids: list[int] | None = None
+    title: str | None = None
+    state: TodoState | None = None
+
+
+class TodoBulkStateSchema(FilterTodoBulk):
+    new_state: TodoState
+
+
+class BulkResultSchema(BaseModel):
+    affected: int
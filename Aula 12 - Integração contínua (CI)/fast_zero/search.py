@@ -0,0 +1,35 @@
+"""
+Busca textual nas tarefas (parâmetro "q" de GET /todos).
+
+- SQLite: tabela virtual FTS5 "todos_fts" (external content) mantida em sincronia com "todos" por triggers, ordenada pelo bm25.
+- Postgres: índice GIN sobre to_tsvector(title || ' ' || description), ordenado pelo ts_rank.
+- Outros bancos: cai no filtro LIKE de título/descrição.
+
+A tabela FTS5, os triggers e o índice GIN são criados junto com a tabela "todos" (ver fast_zero/models.py).
+"""
+
+from sqlalchemy import Select, column, func, literal_column, or_, table
+
+from fast_zero.models import Todo
+
+todos_fts = table('todos_fts', column('rowid'), column('rank'))
+
+
+def fts5_query(q: str) -> str:
+    """Transforma o texto digitado em uma consulta FTS5 segura: cada palavra vira um termo entre aspas (todas precisam aparecer)."""
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in q.split())
+
+
+def search_todos(query: Select, q: str, dialect_name: str) -> Select:
+    """Filtra a query de tarefas pelo texto "q", ordenando pelas mais relevantes."""
+    if dialect_name == 'sqlite':
+        return query.join(todos_fts, todos_fts.c.rowid == Todo.id).where(literal_column('todos_fts').op('MATCH')(fts5_query(q))).order_by(todos_fts.c.rank)
+
+    if dialect_name == 'postgresql':
+        # A expressão precisa ser idêntica à do índice ix_todos_search (com literais, não parâmetros) para o planner usar o índice
+        simple = literal_column("'simple'")
+        document = func.to_tsvector(simple, Todo.title + literal_column("' '") + Todo.description)
+        ts_query = func.websearch_to_tsquery(simple, q)
+        return query.where(document.op('@@')(ts_query)).order_by(func.ts_rank(document, ts_query).desc())
+
+    return query.where(or_(Todo.title.contains(q), Todo.description.contains(q)))  # pragma: no cover
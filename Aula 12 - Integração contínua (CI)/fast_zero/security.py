@@ -6,22 +6,26 @@ import jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fast_zero.database import get_session
 from fast_zero.models import User
 from fast_zero.settings import settings
+from fast_zero.tokens import token_engine
+from fast_zero.user_cache import CachedUser, user_cache
 
 # Configuração inicial do sistema de autenticação
-pwd_context = PasswordHash.recommended()
+pwd_context = PasswordHash((
+    Argon2Hasher(
+        time_cost=settings.PASSWORD_HASH_TIME_COST,
+        memory_cost=settings.PASSWORD_HASH_MEMORY_COST,
+        parallelism=settings.PASSWORD_HASH_PARALLELISM,
+    ),
+))
 oauth2_schema = OAuth2PasswordBearer(tokenUrl='auth/token')  # Define onde buscar o token (header Authorization)
 
-# Configurações JWT
-SECRET_KEY = settings.SECRET_KEY
-ALGORITHM = settings.ALGORITHM
-ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
-
 
 def get_password_hash(password: str):
     """Transforma a senha em um hash seguro para armazenamento"""
@@ -33,52 +37,89 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Compara a senha com o hash e, se o hash foi gerado com parâmetros diferentes dos atuais, devolve também um novo hash para substituí-lo"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def create_access_token(data_payload: dict):
     """Gera um token JWT válido com os dados do usuário"""
     to_encode = data_payload.copy()
-    expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode['exp'] = int(expire.timestamp())
 
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return token_engine.encode(to_encode)
+
+
+def decode_access_token(token: str) -> dict:
+    """Valida assinatura e expiração do token e retorna o payload. Qualquer falha vira 401 (Não autorizado)."""
+    credentials_exception = HTTPException(
+        status_code=HTTPStatus.UNAUTHORIZED,
+        detail='Could not validate credentials',
+        headers={'WWW-Authenticate': 'Bearer'},
+    )
+
+    try:
+        payload = token_engine.decode(token)
+
+    except jwt.PyJWTError:  # Assinatura inválida, token expirado, chave (kid) desconhecida...
+        raise credentials_exception
+
+    if not payload.get('sub'):  # pragma: no cover
+        raise credentials_exception
+
+    return payload
 
 
-def get_current_user(
-    session: Session = Depends(get_session),
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),
     token: str = Depends(oauth2_schema),  # Obtém token automaticamente do header
-):
+) -> CachedUser:
     """
     Valida o token JWT e retorna o usuário correspondente.
 
     Fluxo:
     1. Extrai token do header Authorization (via oauth2_schema)
     2. Decodifica e verifica o token JWT
-    3. Busca usuário no banco de dados
-    4. Retorna objeto do usuário autenticado
+    3. Busca usuário no cache e, se não estiver lá, no banco de dados
+    4. Retorna um retrato imutável (CachedUser) do usuário autenticado
 
     Se falhar em qualquer etapa, retorna erro 401 (Não autorizado)
     """
-    credentials_exception = HTTPException(
-        status_code=HTTPStatus.UNAUTHORIZED,
-        detail='Could not validate credentials',
-        headers={'WWW-Authenticate': 'Bearer'},
-    )
+    user_email = decode_access_token(token)['sub']
 
-    try:
-        payload = jwt.decode(token, key=SECRET_KEY, algorithms=ALGORITHM)
-        user_email = payload.get('sub')
+    # O cache evita um SELECT por requisição autenticada. Ele é invalidado pelas rotas que alteram ou removem o usuário
+    user = await user_cache.get(user_email)
 
-        if not user_email:  # pragma: no cover
-            credentials_exception
+    if user is None:
+        db_user = await session.scalar(select(User).where(User.email == user_email))
 
-    except jwt.DecodeError:  # pragma: no cover
-        raise credentials_exception
+        if not db_user:
+            raise HTTPException(
+                status_code=HTTPStatus.UNAUTHORIZED,
+                detail='Could not validate credentials',
+                headers={'WWW-Authenticate': 'Bearer'},
+            )
 
-    except jwt.ExpiredSignatureError:
-        raise credentials_exception
+        user = CachedUser.from_user(db_user)
+        await user_cache.set(user_email, user)
 
-    user = session.scalar(select(User).where(User.email == user_email))
+    return user
 
-    if not user:  # pragma: no cover
-        credentials_exception
 
-    return user
+async def get_current_user_id(
+    session: AsyncSession = Depends(get_session),
+    token: str = Depends(oauth2_schema),
+) -> int:
+    """
+    Retorna apenas o id do usuário autenticado, lido do claim "uid" do token, sem nenhuma consulta ao banco.
+
+    Serve para rotas que só precisam do id (ex: as de tarefas). Tokens emitidos antes do claim existir não têm "uid", e nesse caso o id vem do get_current_user.
+    Por ser sem estado, o token de um usuário removido continua aceito por essas rotas até expirar (no máximo ACCESS_TOKEN_EXPIRE_MINUTES). As leituras só encontram nada; os INSERTs de tarefas tratam o dono inexistente (ver owner_must_exist em routers/todos.py).
+    """
+    payload = decode_access_token(token)
+
+    if 'uid' in payload:
+        return payload['uid']
+
+    return (await get_current_user(session, token)).id
@@ -1,13 +1,93 @@
+import tempfile
+from pathlib import Path
+from typing import Literal
+
+from pydantic import PositiveInt, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Drivers assíncronos usados para cada banco suportado
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file='./.env', env_file_encoding='utf-8', extra='ignore')
 
-    DATABASE_URL: str = 'sqlite:///database.db'
+    DATABASE_URL: str = 'sqlite+aiosqlite:///database.db'
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Rotação de chaves JWT (ver fast_zero/tokens.py). HS256/HS384/HS512: segredos anteriores ao SECRET_KEY, ainda aceitos na verificação
+    JWT_PREVIOUS_SECRET_KEYS: list[str] = []
+    # ES256/EdDSA: arquivos PEM das chaves privadas; a primeira assina os tokens e as demais só verificam
+    JWT_PRIVATE_KEY_FILES: list[str] = []
+    TOKEN_CACHE_MAX_SIZE: int = 10_000  # Tokens já verificados mantidos em memória até expirarem (0 desativa o cache)
+
+    # Pool de conexões (por worker do uvicorn)
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30.0  # Segundos esperando uma conexão livre antes de lançar erro
+    DATABASE_POOL_RECYCLE: int = -1  # Segundos até uma conexão ser reciclada (-1 desativa)
+    DATABASE_POOL_PRE_PING: bool = False  # Testa a conexão antes de entregá-la (detecta conexões derrubadas pelo banco)
+
+    # Réplicas de leitura (ex: DATABASE_REPLICA_URLS='["postgresql://...@replica1/app", "postgresql://...@replica2/app"]')
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_REPLICA_STRATEGY: Literal['round_robin', 'least_connections'] = 'round_robin'
+
+    # Hash de senhas (Argon2) em pool de processos. None usa um processo por CPU; 0 roda no threadpool, sem processos extras
+    PASSWORD_HASH_WORKERS: int | None = None
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Operações de hash na fila antes de recusar novas requisições com 503
+    # Parâmetros do Argon2 (use `python -m fast_zero.calibrate_password_hash` para escolher). Hashes antigos são refeitos com eles no próximo login
+    PASSWORD_HASH_TIME_COST: int = 3  # Iterações
+    PASSWORD_HASH_MEMORY_COST: int = 65536  # Memória em KiB
+    PASSWORD_HASH_PARALLELISM: int = 4  # Threads por hash
+
+    # Faixas de execução: requisições simultâneas permitidas em cada router, para que um não consuma a capacidade dos outros
+    LANE_AUTH_SIZE: int = 10
+    LANE_USERS_SIZE: int = 20
+    LANE_TODOS_SIZE: int = 40
+
+    # Cache do usuário autenticado (get_current_user). 'memory' é por worker; 'redis' é compartilhado entre workers e requer o pacote redis
+    USER_CACHE_BACKEND: Literal['memory', 'redis'] = 'memory'
+    USER_CACHE_REDIS_URL: str = 'redis://localhost:6379/0'
+    USER_CACHE_TTL_SECONDS: PositiveInt = 60  # No Redis a expiração é em segundos inteiros (SET ... EX), então o mínimo é 1
+    USER_CACHE_MAX_SIZE: int = 10_000
+
+    # Limite de tentativas de login (token bucket): CAPACITY é a rajada permitida e PER_SECOND a taxa com que novas tentativas são liberadas
+    # 'memory' vale por worker (a aplicação avisa na subida se houver mais de um); 'sqlite' compartilha os baldes entre os workers da mesma máquina por um arquivo;
+    # 'redis' compartilha entre workers e máquinas (ex: um Redis/Valkey) e requer o pacote redis
+    LOGIN_RATE_LIMIT_BACKEND: Literal['memory', 'sqlite', 'redis'] = 'memory'
+    LOGIN_RATE_LIMIT_SQLITE_PATH: str = str(Path(tempfile.gettempdir()) / 'fast_zero_login_rate_limit.db')
+    LOGIN_RATE_LIMIT_REDIS_URL: str = 'redis://localhost:6379/0'
+    LOGIN_RATE_LIMIT_IP_CAPACITY: int = 20
+    LOGIN_RATE_LIMIT_IP_PER_SECOND: float = 1.0
+    LOGIN_RATE_LIMIT_USERNAME_CAPACITY: int = 5
+    LOGIN_RATE_LIMIT_USERNAME_PER_SECOND: float = 0.1
+
+    TODO_EXPORT_BATCH_SIZE: PositiveInt = 1000  # Linhas buscadas do banco por vez na exportação de tarefas
+    TODO_BULK_MAX_ITEMS: PositiveInt = 1000  # Máximo de tarefas aceitas por chamada de POST /todos/bulk
+    TODO_BULK_DELETE_CHUNK_SIZE: PositiveInt = 500  # Linhas apagadas por transação em DELETE /todos/bulk, para não segurar locks por muito tempo (com 0 o laço nunca terminaria)
+
+    @field_validator('DATABASE_URL', 'DATABASE_REPLICA_URLS')
+    @classmethod
+    def use_async_driver(cls, value: str | list[str]) -> str | list[str]:
+        """
+        Garante que a URL use um driver assíncrono.
+
+        URLs no formato antigo (ex: 'sqlite:///database.db' ou 'postgresql+psycopg2://...') continuam funcionando, pois o driver síncrono é trocado pelo driver assíncrono equivalente (aiosqlite ou asyncpg).
+        """
+        if isinstance(value, list):
+            return [cls.use_async_driver(url) for url in value]
+
+        scheme, separator, rest = value.partition('://')
+        backend = scheme.split('+')[0]
+
+        if backend in ASYNC_DRIVERS and scheme not in ASYNC_DRIVERS.values():
+            return f'{ASYNC_DRIVERS[backend]}{separator}{rest}'
+
+        return value
 
 
 settings = Settings()
@@ -0,0 +1,164 @@
+"""
+Motor de tokens JWT: prepara as chaves uma única vez e assina/verifica os tokens de acesso.
+
+Algoritmos suportados: HS256/HS384/HS512 (segredo compartilhado, SECRET_KEY) e ES256/EdDSA (par de chaves, arquivos PEM em JWT_PRIVATE_KEY_FILES).
+
+Rotação de chaves: a primeira chave da lista assina os novos tokens e todas as outras continuam aceitas na verificação. Cada token leva no header o "kid" da chave que o assinou.
+Para trocar a chave, coloque a nova no início da lista e remova a antiga depois que os tokens assinados por ela expirarem (ACCESS_TOKEN_EXPIRE_MINUTES).
+No HMAC as chaves anteriores ficam em JWT_PREVIOUS_SECRET_KEYS. Nos algoritmos assimétricos as chaves públicas são publicadas no JWKS (GET /auth/jwks.json).
+
+Gerar uma chave nova:
+    python -m fast_zero.generate_jwt_key --algorithm EdDSA keys/2026-10.pem
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from time import time
+from typing import Any
+
+import jwt
+
+from fast_zero.settings import settings
+
+HMAC_ALGORITHMS = {'HS256', 'HS384', 'HS512'}
+ASYMMETRIC_ALGORITHMS = {'ES256', 'EdDSA'}
+
+
+@dataclass(frozen=True)
+class TokenKey:
+    kid: str
+    signing_key: Any  # Segredo (bytes) no HMAC, chave privada já carregada nos assimétricos
+    verifying_key: Any  # Segredo (bytes) no HMAC, chave pública nos assimétricos
+
+
+class VerifiedTokenCache:
+    """
+    Cache LRU dos tokens já verificados: um cliente envia o mesmo token milhares de vezes até ele expirar, e só a primeira verificação precisa checar a assinatura.
+
+    - A chave é um digest do token com um segredo aleatório do processo (BLAKE2b com chave). Assim o tempo da busca no dicionário não depende de nada que um atacante consiga prever, e o token em si não fica guardado.
+    - Cada entrada vale até o "exp" do token; tokens sem "exp" não entram no cache.
+    - Com mais de `max_size` entradas as usadas há mais tempo são descartadas.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._key = os.urandom(32)
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    def _digest(self, token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), key=self._key, digest_size=16).digest()
+
+    def get(self, token: str) -> dict | None:
+        digest = self._digest(token)
+        entry = self._entries.get(digest)
+
+        if entry is None or entry[0] <= time():
+            self._entries.pop(digest, None)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(digest)
+        self.hits += 1
+
+        return dict(entry[1])  # Cópia, para que quem recebe não altere o que está no cache
+
+    def set(self, token: str, claims: dict):
+        if 'exp' not in claims:
+            return
+
+        self._entries[self._digest(token)] = (claims['exp'], dict(claims))
+
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def metrics(self) -> dict:
+        return {'size': len(self._entries), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+
+class TokenEngine:
+    """Assina e verifica tokens com chaves já preparadas, evitando que o PyJWT converta a chave (ex: ler o PEM) a cada chamada."""
+
+    def __init__(self, algorithm: str, keys: list[TokenKey], cache: VerifiedTokenCache | None = None):
+        if algorithm not in HMAC_ALGORITHMS | ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f'Unsupported JWT algorithm: {algorithm}')
+
+        if not keys:
+            raise ValueError(f'No signing key configured for {algorithm}')
+
+        self.algorithm = algorithm
+        self.active_key = keys[0]
+        self.keys = {key.kid: key for key in keys}
+        self.cache = cache
+
+    @classmethod
+    def from_settings(cls) -> 'TokenEngine':
+        algorithm = settings.ALGORITHM
+
+        if algorithm in HMAC_ALGORITHMS:
+            keys = [hmac_key(secret) for secret in (settings.SECRET_KEY, *settings.JWT_PREVIOUS_SECRET_KEYS)]
+        else:
+            keys = [load_private_key(algorithm, Path(path)) for path in settings.JWT_PRIVATE_KEY_FILES]
+
+        return cls(algorithm, keys, VerifiedTokenCache(settings.TOKEN_CACHE_MAX_SIZE) if settings.TOKEN_CACHE_MAX_SIZE else None)
+
+    def encode(self, payload: dict) -> str:
+        return jwt.encode(payload, self.active_key.signing_key, algorithm=self.algorithm, headers={'kid': self.active_key.kid})
+
+    def decode(self, token: str) -> dict:
+        """Retorna os claims do token, do cache de tokens já verificados quando possível."""
+        if self.cache is None:
+            return self.verify(token)
+
+        claims = self.cache.get(token)
+
+        if claims is None:
+            claims = self.verify(token)
+            self.cache.set(token, claims)
+
+        return claims
+
+    def verify(self, token: str) -> dict:
+        """
+        Verifica o token com a chave indicada no "kid". Tokens sem "kid" (emitidos antes da rotação existir) são verificados com a chave ativa.
+
+        Com uma única chave o header não é lido: um token de outra chave já falha na verificação da assinatura, e isso poupa uma decodificação a mais por requisição.
+        """
+        if len(self.keys) == 1:
+            return jwt.decode(token, self.active_key.verifying_key, algorithms=[self.algorithm])
+
+        kid = jwt.get_unverified_header(token).get('kid')
+        key = self.keys.get(kid) if kid else self.active_key
+
+        if key is None:
+            raise jwt.InvalidKeyError(f'Unknown key id: {kid}')
+
+        return jwt.decode(token, key.verifying_key, algorithms=[self.algorithm])
+
+    def jwks(self) -> dict:
+        """Documento JWKS com as chaves públicas aceitas. No HMAC fica vazio, já que o segredo nunca pode ser publicado."""
+        if self.algorithm in HMAC_ALGORITHMS:
+            return {'keys': []}
+
+        algorithm = jwt.get_algorithm_by_name(self.algorithm)
+
+        return {'keys': [{**algorithm.to_jwk(key.verifying_key, as_dict=True), 'kid': key.kid, 'alg': self.algorithm, 'use': 'sig'} for key in self.keys.values()]}
+
+
+def hmac_key(secret: str) -> TokenKey:
+    # O kid é parte do hash do segredo, assim identifica a chave sem expô-la
+    prepared = jwt.get_algorithm_by_name('HS256').prepare_key(secret)
+    return TokenKey(kid=hashlib.sha256(prepared).hexdigest()[:16], signing_key=prepared, verifying_key=prepared)
+
+
+def load_private_key(algorithm: str, path: Path) -> TokenKey:
+    """Carrega a chave privada PEM do arquivo. O kid é o nome do arquivo sem extensão (ex: keys/2026-10.pem -> '2026-10')."""
+    private_key = jwt.get_algorithm_by_name(algorithm).prepare_key(path.read_bytes())
+    return TokenKey(kid=path.stem, signing_key=private_key, verifying_key=private_key.public_key())
+
+
+token_engine = TokenEngine.from_settings()
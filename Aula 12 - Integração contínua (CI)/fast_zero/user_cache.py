@@ -0,0 +1,122 @@
+import json
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from time import monotonic
+
+from fast_zero.models import User
+from fast_zero.settings import settings
+
+
+@dataclass(frozen=True, slots=True)
+class CachedUser:
+    """Retrato imutável do usuário autenticado. É o que o get_current_user entrega às rotas, no lugar da instância do ORM (que fica presa à sessão que a carregou)."""
+
+    id: int
+    username: str
+    email: str
+
+    @classmethod
+    def from_user(cls, user: User) -> 'CachedUser':
+        return cls(id=user.id, username=user.username, email=user.email)
+
+
+class MemoryUserCache:
+    """
+    Cache de usuários em memória, com expiração (TTL) e descarte do menos usado recentemente (LRU) quando passa de `max_size` entradas.
+
+    Cada worker do uvicorn tem o seu, então a invalidação feita por um worker não chega nos outros: neles o dado antigo vive no máximo `ttl` segundos. Para invalidação imediata entre workers use o backend 'redis'.
+    """
+
+    backend = 'memory'
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, CachedUser]] = OrderedDict()
+
+    async def get(self, key: str) -> CachedUser | None:
+        entry = self._entries.get(key)
+
+        if entry is None or entry[0] <= monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return entry[1]
+
+    async def set(self, key: str, user: CachedUser):
+        self._entries[key] = (monotonic() + self.ttl, user)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    async def clear(self):
+        self._entries.clear()
+
+    def metrics(self) -> dict:
+        return {'backend': self.backend, 'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class RedisUserCache:
+    """
+    Cache de usuários compartilhado entre workers, guardado no Redis com expiração (SET ... EX).
+
+    Requer o pacote `redis` instalado. Os contadores de acertos/erros são do worker que responde às métricas.
+    """
+
+    backend = 'redis'
+    prefix = 'fast_zero:user:'
+
+    def __init__(self, url: str, ttl: float):
+        try:
+            from redis import asyncio as redis  # noqa: PLC0415 - Dependência opcional, só é necessária com este backend
+        except ImportError as error:  # pragma: no cover
+            raise RuntimeError("USER_CACHE_BACKEND='redis' requires the 'redis' package") from error
+
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> CachedUser | None:
+        value = await self.client.get(self.prefix + key)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        return CachedUser(**json.loads(value))
+
+    async def set(self, key: str, user: CachedUser):
+        await self.client.set(self.prefix + key, json.dumps(asdict(user)), ex=int(self.ttl))
+
+    async def invalidate(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+    async def clear(self):
+        async for key in self.client.scan_iter(f'{self.prefix}*'):
+            await self.client.delete(key)
+
+    def metrics(self) -> dict:
+        return {'backend': self.backend, 'size': None, 'hits': self.hits, 'misses': self.misses}
+
+
+def create_user_cache() -> MemoryUserCache | RedisUserCache:
+    if settings.USER_CACHE_BACKEND == 'redis':
+        return RedisUserCache(settings.USER_CACHE_REDIS_URL, settings.USER_CACHE_TTL_SECONDS)
+
+    return MemoryUserCache(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_SIZE)
+
+
+user_cache = create_user_cache()
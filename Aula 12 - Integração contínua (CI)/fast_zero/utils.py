@@ -1,15 +1,34 @@
+import base64
+import binascii
+import json
 from http import HTTPStatus
 
-from fastapi import HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import Insert, Select, or_, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fast_zero.models import User
+from fast_zero.schemas import FilterPage
 
 
-def get_object_or_404(model, obj_id: int, session: Session, detail: str = 'Object not found'):
-    """Função para obter um objeto ou lançar uma exceção 404."""
-    obj = session.scalar(select(model).where(model.id == obj_id))
+def columns_for(schema: type[BaseModel], model) -> list:
+    """
+    Colunas do modelo que o schema de resposta usa (ex: UserPublicSchema -> User.id, User.username, User.email).
+
+    Selecionar só essas colunas (projeção) devolve linhas leves (Row) em vez de objetos do ORM: nada de carregar o hash da senha e os timestamps só para descartá-los, nem de registrar cada objeto no identity map da sessão.
+    """
+    return [getattr(model, field) for field in schema.model_fields]
+
+
+async def get_object_or_404(model, obj_id: int, session: AsyncSession, detail: str = 'Object not found', columns: list | None = None):
+    """Função para obter um objeto ou lançar uma exceção 404. Com "columns" retorna apenas uma linha com essas colunas (ver columns_for)."""
+    if columns:
+        obj = (await session.execute(select(*columns).where(model.id == obj_id))).first()
+    else:
+        obj = await session.scalar(select(model).where(model.id == obj_id))
 
     if not obj:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=detail)
@@ -17,9 +36,39 @@ def get_object_or_404(model, obj_id: int, session: Session, detail: str = 'Objec
     return obj
 
 
-def validate_username_or_email(username: str, email: str, session: Session, user_id: int = None):
-    """Verifica se o username ou email já estão cadastrados."""
-    db_user = session.scalar(select(User).where((User.username == username) | (User.email == email)))
+async def release_connection(session: AsyncSession):
+    """
+    Encerra a transação atual para devolver a conexão ao pool antes de um trabalho demorado que não usa o banco (ex: hash Argon2).
+
+    Usa commit e não rollback porque, com expire_on_commit=False, os objetos já carregados continuam acessíveis (o rollback os expiraria). A próxima consulta da sessão pega uma conexão nova do pool.
+    """
+    await session.commit()
+
+
+def insert_ignoring_conflicts(model, dialect_name: str) -> Insert:
+    """INSERT ... ON CONFLICT DO NOTHING no dialeto do banco: em vez de erro, uma linha que viola uma restrição única simplesmente não é inserida (e o RETURNING vem vazio)."""
+    if dialect_name == 'postgresql':
+        return postgresql_insert(model).on_conflict_do_nothing()
+
+    return sqlite_insert(model).on_conflict_do_nothing()
+
+
+async def raise_registration_conflict(username: str, session: AsyncSession):
+    """Depois de um INSERT ignorado por conflito, descobre qual restrição única foi violada e lança o erro correspondente."""
+    if await session.scalar(select(User.id).where(User.username == username)):
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Username already registered')
+
+    raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Email already registered')
+
+
+async def validate_username_or_email(username: str | None, email: str | None, session: AsyncSession, user_id: int = None):
+    """Verifica se o username ou email já estão cadastrados. Um campo None não é verificado (e sem nenhum dos dois nem há consulta)."""
+    conditions = [column == value for column, value in ((User.username, username), (User.email, email)) if value is not None]
+
+    if not conditions:
+        return
+
+    db_user = await session.scalar(select(User).where(or_(*conditions)))
 
     if db_user and db_user.id != user_id:
         if db_user.username == username:
@@ -32,3 +81,42 @@ def validate_username_or_email(username: str, email: str, session: Session, user
                 status_code=HTTPStatus.BAD_REQUEST,
                 detail='Email already registered',
             )
+
+
+def encode_cursor(last_id: int) -> str:
+    """Gera o token opaco de paginação a partir do último id da página."""
+    return base64.urlsafe_b64encode(json.dumps({'id': last_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """Lê o último id de um token de paginação, lançando 400 se o token for inválido."""
+    try:
+        last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))['id']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        last_id = None
+
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+
+    return last_id
+
+
+def paginate(query: Select, model, filter_page: FilterPage) -> Select:
+    """
+    Aplica ordenação estável e paginação na query.
+
+    - Com "cursor" usa paginação por keyset (WHERE id > último id), que não precisa descartar linhas e por isso tem o mesmo custo em qualquer página.
+    - Sem "cursor" mantém a paginação por OFFSET ("skip"), para compatibilidade.
+    """
+    query = query.order_by(model.id).limit(filter_page.limit)
+
+    if filter_page.cursor:
+        return query.where(model.id > decode_cursor(filter_page.cursor))
+
+    return query.offset(filter_page.skip)
+
+
+def set_next_cursor(response: Response, items: list, limit: int):
+    """Informa o cursor da próxima página no header "X-Next-Cursor" quando a página veio cheia."""
+    if items and len(items) == limit:
+        response.headers['X-Next-Cursor'] = encode_cursor(items[-1].id)
@@ -0,0 +1,45 @@
+"""Índices compostos da tabela todos
+
+Revision ID: 1ab84d431fdd
+Revises: 04ecd532a14d
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from contextlib import nullcontext
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1ab84d431fdd'
+down_revision: Union[str, None] = '04ecd532a14d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_todos_user_id_id': ['user_id', 'id'],
+    'ix_todos_user_id_state_id': ['user_id', 'state', 'id'],
+}
+
+
+def index_block():
+    """No Postgres os índices são criados com CONCURRENTLY, que não bloqueia escritas na tabela mas não pode rodar dentro de uma transação."""
+    if op.get_context().dialect.name == 'postgresql':
+        return op.get_context().autocommit_block()
+
+    return nullcontext()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with index_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, 'todos', columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with index_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='todos', postgresql_concurrently=True)
@@ -0,0 +1,60 @@
+"""Ids sem reaproveitamento no SQLite
+
+Revision ID: 3f9c1e7a2b64
+Revises: 8d3b6a1f42c7
+Create Date: 2026-10-18 21:12:44.310927
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1e7a2b64'
+down_revision: Union[str, None] = '8d3b6a1f42c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Recriar a tabela "todos" remove os triggers que mantêm a busca textual (todos_fts) em sincronia, então eles são criados de novo
+SQLITE_TODOS_TRIGGERS = [
+    'CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN '
+    'INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END',
+    'CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN '
+    "INSERT INTO todos_fts(todos_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); END",
+    'CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, description ON todos BEGIN '
+    "INSERT INTO todos_fts(todos_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+    'INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END',
+]
+
+
+def recreate_tables(autoincrement: bool) -> None:
+    """
+    No SQLite o AUTOINCREMENT só pode ser definido na criação da tabela, então "users" e "todos" são recriadas (modo batch do Alembic).
+
+    O índice de lower(email) é de expressão, que o SQLite não consegue refletir, então é criado de novo à parte.
+    """
+    op.drop_index('ix_users_email_lower', table_name='users')
+
+    for table_name in ('users', 'todos'):
+        with op.batch_alter_table(table_name, recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}):
+            pass
+
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')])
+
+    for statement in SQLITE_TODOS_TRIGGERS:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # No Postgres os ids vêm de sequences, que nunca voltam atrás: nada a fazer
+    if op.get_context().dialect.name == 'sqlite':
+        recreate_tables(autoincrement=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name == 'sqlite':
+        recreate_tables(autoincrement=False)
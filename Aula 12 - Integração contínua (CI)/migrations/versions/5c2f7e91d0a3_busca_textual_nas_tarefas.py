@@ -0,0 +1,62 @@
+"""Busca textual nas tarefas
+
+Revision ID: 5c2f7e91d0a3
+Revises: 1ab84d431fdd
+Create Date: 2026-10-18 11:02:17.554012
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2f7e91d0a3'
+down_revision: Union[str, None] = '1ab84d431fdd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE todos_fts USING fts5(title, description, content='todos', content_rowid='id')",
+    'CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN '
+    'INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END',
+    'CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN '
+    "INSERT INTO todos_fts(todos_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); END",
+    'CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, description ON todos BEGIN '
+    "INSERT INTO todos_fts(todos_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+    'INSERT INTO todos_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END',
+    # Indexa as tarefas que já existem
+    "INSERT INTO todos_fts(todos_fts) VALUES ('rebuild')",
+]
+SQLITE_DOWNGRADE = [
+    'DROP TRIGGER IF EXISTS todos_fts_insert',
+    'DROP TRIGGER IF EXISTS todos_fts_delete',
+    'DROP TRIGGER IF EXISTS todos_fts_update',
+    'DROP TABLE IF EXISTS todos_fts',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_context().dialect.name
+
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+
+    elif dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("CREATE INDEX CONCURRENTLY ix_todos_search ON todos USING GIN (to_tsvector('simple', title || ' ' || description))")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_context().dialect.name
+
+    if dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+
+    elif dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_todos_search')
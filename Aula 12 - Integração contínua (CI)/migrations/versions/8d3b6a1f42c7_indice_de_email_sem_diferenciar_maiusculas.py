@@ -0,0 +1,39 @@
+"""Índice de email sem diferenciar maiúsculas
+
+Revision ID: 8d3b6a1f42c7
+Revises: 5c2f7e91d0a3
+Create Date: 2026-10-18 16:04:27.519833
+
+"""
+from contextlib import nullcontext
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3b6a1f42c7'
+down_revision: Union[str, None] = '5c2f7e91d0a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def index_block():
+    """No Postgres o índice é criado com CONCURRENTLY, que não bloqueia escritas na tabela mas não pode rodar dentro de uma transação."""
+    if op.get_context().dialect.name == 'postgresql':
+        return op.get_context().autocommit_block()
+
+    return nullcontext()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with index_block():
+        op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with index_block():
+        op.drop_index('ix_users_email_lower', table_name='users', postgresql_concurrently=True)
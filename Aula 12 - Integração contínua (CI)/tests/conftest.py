@@ -1,15 +1,18 @@
 import pytest
+import pytest_asyncio
 from factory.base import Factory
 from factory.declarations import LazyAttribute, Sequence
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.pool import StaticPool
 
 from fast_zero.app import app
-from fast_zero.database import get_session
+from fast_zero.database import get_session, get_session_factory
 from fast_zero.models import User, table_registry
+from fast_zero.rate_limit import rate_limiter
 from fast_zero.security import create_access_token, get_password_hash
+from fast_zero.user_cache import user_cache
 
 
 class UserFactory(Factory):
@@ -35,8 +38,13 @@ def client(
         # Retorna uma sessão de banco de dados em memória para os testes
         return session
 
+    def get_session_factory_override():
+        # Tarefas em segundo plano abrem a própria sessão, sobre o mesmo banco em memória dos testes
+        return lambda: AsyncSession(session.bind, expire_on_commit=False)
+
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_session_factory] = get_session_factory_override
 
         yield client
 
@@ -44,45 +52,77 @@ def client(
     app.dependency_overrides.clear()
 
 
+@pytest_asyncio.fixture(autouse=True)
+async def clear_user_cache():
+    # Cada teste recria o banco, então usuários em cache de um teste não podem vazar para o próximo
+    yield
+    await user_cache.clear()
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clear_rate_limiter():
+    # Todos os testes usam o mesmo IP do TestClient, então as tentativas de login de um teste não podem contar no próximo
+    yield
+    await rate_limiter.clear()
+
+
 @pytest.fixture
-def session():
+def fake_redis(monkeypatch):
+    """
+    Substitui o Redis por um servidor em memória (fakeredis, que também executa scripts Lua) para os backends 'redis'.
+
+    Todos os clientes criados no teste usam o mesmo servidor, como vários workers ligados ao mesmo Redis.
+    """
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr('redis.asyncio.from_url', lambda url, **kwargs: fakeredis.FakeAsyncRedis(server=server))
+
+    return server
+
+
+@pytest_asyncio.fixture
+async def session():
     # Usa banco de dados em memória para isolamento dos testes
-    engine = create_engine(
-        'sqlite:///:memory:',
+    engine = create_async_engine(
+        'sqlite+aiosqlite:///:memory:',
         connect_args={'check_same_thread': False},  # Necessário para SQLite em threads diferentes
         poolclass=StaticPool,  # Usa um pool de conexão estático para evitar problemas de concorrência
     )
 
     # Cria todas as tabelas
-    table_registry.metadata.create_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
 
-    with Session(engine) as session:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session  # Retorna a sessão criada, quando o argumento session for passado para a função o que vai ser retornado é o que está acompanhado do "yield" e a fixture vai parar ali, depois que o teste terminar a sessão será fechada e o banco de dados em memória será destruído
 
     # Limpa todas as tabelas, SÓ É EXECUTADO AO FINAL DO TESTE
-    table_registry.metadata.drop_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
 
+    await engine.dispose()
 
-@pytest.fixture
-def user(session: Session):
+
+@pytest_asyncio.fixture
+async def user(session: AsyncSession):
     password = 'testtest'
     user = UserFactory(password=get_password_hash(password))
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     user.clean_password = password  # Atribui dinamicamente um novo atributo a essa instância
 
     return user
 
 
-@pytest.fixture
-def user2(session: Session):
+@pytest_asyncio.fixture
+async def user2(session: AsyncSession):
     password = 'testtest'
     user = UserFactory(password=get_password_hash(password))
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     user.clean_password = password  # Atribui dinamicamente um novo atributo a essa instância
 
@@ -91,7 +131,25 @@ def user2(session: Session):
 
 @pytest.fixture
 def create_token():
-    def _create_token(email: str):
-        return create_access_token(data_payload={'sub': email})
+    def _create_token(email: str, user_id: int | None = None):
+        # Sem user_id o token fica no formato antigo (apenas "sub"), sem o claim "uid"
+        payload = {'sub': email} if user_id is None else {'sub': email, 'uid': user_id}
+        return create_access_token(data_payload=payload)
 
     return _create_token
+
+
+@pytest.fixture
+def queries(session):
+    """Registra os comandos SQL executados pela sessão de teste, para medir quantas idas ao banco cada endpoint faz."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.bind.sync_engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+
+    yield statements
+
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
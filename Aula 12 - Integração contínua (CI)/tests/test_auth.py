@@ -1,8 +1,17 @@
 from datetime import datetime, timedelta
 from http import HTTPStatus
 
+import jwt
+import pytest
 from freezegun import freeze_time
-
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fast_zero.models import User
+from fast_zero.routers.auth import rehash_password
+from fast_zero.security import verify_and_update_password
 from fast_zero.settings import settings
 
 
@@ -88,3 +97,77 @@ def test_token_expired_dont_refresh(client, user):
         )
         assert response.status_code == HTTPStatus.UNAUTHORIZED
         assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_token_carries_user_id_claim(client, user):
+    response = client.post('/auth/token', data={'username': user.email, 'password': user.clean_password})
+    payload = jwt.decode(response.json()['access_token'], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    assert payload['sub'] == user.email
+    assert payload['uid'] == user.id
+
+
+def test_get_token_with_email_in_other_case(client, user):
+    response = client.post('/auth/token', data={'username': user.email.upper(), 'password': user.clean_password})
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_login_with_emails_that_differ_only_by_case(client):
+    # A unicidade do email diferencia maiúsculas, então as duas contas podem existir
+    for email, password in (('Bob@example.com', 'upper-secret'), ('bob@example.com', 'lower-secret')):
+        response = client.post('/users', json={'username': email.split('@')[0] + password[0], 'email': email, 'password': password})
+        assert response.status_code == HTTPStatus.CREATED
+
+    # O email exato sempre encontra a própria conta
+    for email, password in (('Bob@example.com', 'upper-secret'), ('bob@example.com', 'lower-secret')):
+        response = client.post('/auth/token', data={'username': email, 'password': password})
+        assert response.status_code == HTTPStatus.OK
+
+    # Em outra grafia não há como saber qual das duas é, então nenhuma é usada
+    response = client.post('/auth/token', data={'username': 'BOB@EXAMPLE.COM', 'password': 'lower-secret'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_get_token_with_username(client, user, queries):
+    response = client.post('/auth/token', data={'username': user.username, 'password': user.clean_password})
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(queries) == 1  # Sem '@' vai direto ao índice de username
+    assert ' OR ' not in queries[0]
+
+
+def test_get_token_with_email_makes_a_single_query(client, user, queries):
+    for login in (user.email, 'nobody@example.com'):
+        queries.clear()
+        client.post('/auth/token', data={'username': login, 'password': user.clean_password})
+
+        assert len(queries) == 1  # Uma ida ao banco, inclusive para um login que não existe
+        assert queries[0].count('UNION ALL') == 2  # noqa: PLR2004 - Email exato, lower(email) e username
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_password_with_outdated_parameters(client, session, user):
+    outdated_hash = PasswordHash((Argon2Hasher(time_cost=1, memory_cost=8192, parallelism=1),)).hash(user.clean_password)
+    await session.execute(update(User).where(User.id == user.id).values(password=outdated_hash))
+    await session.commit()
+
+    response = client.post('/auth/token', data={'username': user.email, 'password': user.clean_password})
+
+    # O TestClient só retorna depois de executar as tarefas em segundo plano
+    user_id = user.id
+    session.expire_all()
+    new_hash = await session.scalar(select(User.password).where(User.id == user_id))
+    assert response.status_code == HTTPStatus.OK
+    assert new_hash != outdated_hash
+    assert verify_and_update_password(user.clean_password, new_hash) == (True, None)
+
+
+@pytest.mark.asyncio
+async def test_rehash_does_not_overwrite_a_changed_password(session, user):
+    user_id, current_hash = user.id, user.password
+
+    await rehash_password(user_id, 'hash-from-before-a-password-change', 'new-hash', lambda: AsyncSession(session.bind))
+
+    session.expire_all()
+    assert await session.scalar(select(User.password).where(User.id == user_id)) == current_hash
@@ -0,0 +1,15 @@
+from fast_zero.calibrate_password_hash import calibrate
+
+
+def test_calibrate_falls_back_to_minimum_cost_when_target_is_unreachable():
+    time_cost, memory_cost, elapsed = calibrate(target_ms=0, max_memory_kib=16384, min_memory_kib=8192, parallelism=1, samples=1)
+
+    assert (time_cost, memory_cost) == (1, 8192)
+    assert elapsed > 0
+
+
+def test_calibrate_raises_time_cost_while_under_target():
+    time_cost, memory_cost, _ = calibrate(target_ms=10_000, max_memory_kib=8, min_memory_kib=8, parallelism=1, samples=1)
+
+    assert memory_cost == 8  # noqa: PLR2004
+    assert time_cost > 1
@@ -0,0 +1,272 @@
+import time
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fast_zero import hashing
+from fast_zero.app import app
+from fast_zero.database import InstrumentedQueuePool, ReplicaSelector, RoutingSession, create_engine_from_settings, get_pool_metrics, get_session
+from fast_zero.hashing import password_hasher
+from fast_zero.models import User, table_registry
+from fast_zero.settings import Settings
+
+
+@pytest.mark.parametrize(
+    ('url', 'expected'),
+    [
+        ('sqlite:///database.db', 'sqlite+aiosqlite:///database.db'),
+        ('postgresql+psycopg2://app:app@db/app', 'postgresql+asyncpg://app:app@db/app'),
+        ('postgresql+asyncpg://app:app@db/app', 'postgresql+asyncpg://app:app@db/app'),
+    ],
+)
+def test_settings_database_url_uses_async_driver(url, expected):
+    assert Settings(DATABASE_URL=url).DATABASE_URL == expected
+    assert Settings(DATABASE_REPLICA_URLS=[url]).DATABASE_REPLICA_URLS == [expected]
+
+
+@pytest.mark.asyncio
+async def test_engine_uses_instrumented_pool(tmp_path):
+    engine = create_engine_from_settings(f'sqlite+aiosqlite:///{tmp_path / "pool.db"}')
+
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+
+    async with engine.connect() as conn:
+        await conn.execute(text('SELECT 1'))
+
+        metrics = get_pool_metrics(engine)
+        assert metrics['checked_out'] == 1
+
+    metrics = get_pool_metrics(engine)
+    await engine.dispose()
+
+    assert metrics['checked_out'] == 0
+    assert metrics['idle'] == 1
+    assert metrics['checkouts'] == 1
+    assert metrics['checkout_wait_max_ms'] >= 0
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_survive_dispose(tmp_path):
+    engine = create_engine_from_settings(f'sqlite+aiosqlite:///{tmp_path / "pool.db"}')
+
+    for _ in range(3):
+        async with engine.connect() as conn:
+            await conn.execute(text('SELECT 1'))
+
+        # O dispose troca o pool por um novo (Pool.recreate), que herda os listeners do anterior
+        await engine.dispose()
+
+    metrics = get_pool_metrics(engine)
+
+    assert metrics['checkouts'] == 3  # noqa: PLR2004
+    assert engine.pool.checkout_hold.count == 3  # noqa: PLR2004
+    assert len(engine.pool.dispatch.checkin) == 1  # Os listeners não se acumulam a cada dispose
+    assert metrics['checkout_hold_max_ms'] > 0
+
+
+@pytest.mark.asyncio
+async def test_memory_engine_keeps_default_pool():
+    engine = create_engine_from_settings('sqlite+aiosqlite:///:memory:')
+
+    assert get_pool_metrics(engine) == {'pool_class': type(engine.pool).__name__}
+
+    await engine.dispose()
+
+
+def test_pool_metrics_endpoint(client):
+    response = client.get('/metrics/pool')
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'pool_class' in response.json()
+
+
+@pytest_asyncio.fixture
+async def primary_and_replica(tmp_path):
+    """Dois bancos distintos com o mesmo esquema, cada um com um usuário diferente, para identificar de onde veio a leitura."""
+    engines = []
+
+    for name in ('primary', 'replica'):
+        engine = create_engine_from_settings(f'sqlite+aiosqlite:///{tmp_path / name}.db')
+
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
+
+        async with AsyncSession(engine) as session:
+            session.add(User(username=name, email=f'{name}@test.com', password='secret'))
+            await session.commit()
+
+        engines.append(engine)
+
+    yield engines
+
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_routing_session_reads_from_replica(primary_and_replica):
+    primary, replica = primary_and_replica
+
+    async with AsyncSession(sync_session_class=RoutingSession, primary=primary, replicas=ReplicaSelector([replica])) as session:
+        usernames = (await session.scalars(select(User.username))).all()
+
+    assert usernames == ['replica']
+
+
+@pytest.mark.asyncio
+async def test_routing_session_sticks_to_primary_after_write(primary_and_replica):
+    primary, replica = primary_and_replica
+
+    async with AsyncSession(sync_session_class=RoutingSession, primary=primary, replicas=ReplicaSelector([replica]), expire_on_commit=False) as session:
+        session.add(User(username='new', email='new@test.com', password='secret'))
+        await session.commit()
+
+        usernames = (await session.scalars(select(User.username).order_by(User.id))).all()
+
+    assert usernames == ['primary', 'new']
+
+
+@pytest.mark.asyncio
+async def test_routing_session_without_replicas_uses_primary(primary_and_replica):
+    primary, _ = primary_and_replica
+
+    async with AsyncSession(sync_session_class=RoutingSession, primary=primary, replicas=ReplicaSelector([])) as session:
+        usernames = (await session.scalars(select(User.username))).all()
+
+    assert usernames == ['primary']
+
+
+@pytest.fixture
+def lagging_replica_client(tmp_path, create_token):
+    """
+    Cliente da API com o RoutingSession de verdade, sobre um principal e uma réplica atrasada: os dois têm a alice, mas o bob só chegou ao principal.
+
+    Retorna o cliente e os headers de autenticação da alice.
+    """
+    primary = create_engine_from_settings(f'sqlite+aiosqlite:///{tmp_path / "primary.db"}')
+    replica = create_engine_from_settings(f'sqlite+aiosqlite:///{tmp_path / "replica.db"}')
+
+    async def seed(engine, usernames):
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
+
+        async with AsyncSession(engine) as session:
+            session.add_all(User(username=username, email=f'{username}@test.com', password='secret') for username in usernames)
+            await session.commit()
+
+    async def get_session_override():
+        async with AsyncSession(sync_session_class=RoutingSession, primary=primary, replicas=ReplicaSelector([replica]), expire_on_commit=False) as session:
+            yield session
+
+    with TestClient(app) as client:
+        client.portal.call(seed, primary, ['alice', 'bob'])
+        client.portal.call(seed, replica, ['alice'])
+        app.dependency_overrides[get_session] = get_session_override
+
+        yield client, {'Authorization': f'Bearer {create_token("alice@test.com")}'}
+
+        app.dependency_overrides.clear()
+        client.portal.call(primary.dispose)
+        client.portal.call(replica.dispose)
+
+
+def test_app_reads_go_to_replica(lagging_replica_client):
+    client, _ = lagging_replica_client
+
+    assert [user['username'] for user in client.get('/users').json()] == ['alice']
+
+
+@pytest.mark.parametrize('method', ['put', 'patch'])
+def test_uniqueness_check_before_write_uses_primary(lagging_replica_client, method):
+    client, headers = lagging_replica_client
+
+    # Na réplica o username "bob" ainda está livre; a verificação precisa ver o principal para responder 400 em vez de falhar no UPDATE
+    response = client.request(method.upper(), '/users', headers=headers, json={'username': 'bob', 'email': 'alice@test.com', 'password': 'secret'})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Username already registered'}
+
+
+def test_login_right_after_signup_uses_primary(lagging_replica_client):
+    client, _ = lagging_replica_client
+    credentials = {'username': 'carol', 'email': 'carol@test.com', 'password': 'secret'}
+
+    assert client.post('/users', json=credentials).status_code == HTTPStatus.CREATED
+    # A réplica ainda não tem a carol; o login precisa procurá-la no principal
+    response = client.post('/auth/token', data={'username': 'carol@test.com', 'password': 'secret'})
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_replica_selector_round_robin():
+    selector = ReplicaSelector(['a', 'b'])
+
+    assert [selector.choose() for _ in range(3)] == ['a', 'b', 'a']
+
+
+@pytest.mark.asyncio
+async def test_replica_selector_least_connections(primary_and_replica):
+    busy, idle = primary_and_replica
+    selector = ReplicaSelector([busy, idle], strategy='least_connections')
+
+    async with busy.connect() as conn:
+        await conn.execute(text('SELECT 1'))
+
+        assert selector.choose() is idle
+
+
+SLOW_HASH_SECONDS = 0.2
+
+
+def slow(func):
+    def wrapper(*args):
+        time.sleep(SLOW_HASH_SECONDS)
+        return func(*args)
+
+    return wrapper
+
+
+@pytest.fixture
+def pooled_client(tmp_path, monkeypatch):
+    """Cliente da API sobre um banco em arquivo com o InstrumentedQueuePool e um hash de senha artificialmente lento, para medir quanto tempo cada conexão fica emprestada."""
+    engine = create_engine_from_settings(f'sqlite+aiosqlite:///{tmp_path / "pool.db"}')
+
+    async def get_session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    monkeypatch.setattr(password_hasher, 'max_workers', 0)  # No threadpool, para que o hash lento abaixo seja o usado
+    monkeypatch.setattr(hashing, 'get_password_hash', slow(hashing.get_password_hash))
+    monkeypatch.setattr(hashing, 'verify_and_update_password', slow(hashing.verify_and_update_password))
+
+    with TestClient(app) as client:
+        client.portal.call(create_tables, engine)
+        app.dependency_overrides[get_session] = get_session_override
+
+        yield client, engine.pool
+
+        app.dependency_overrides.clear()
+        client.portal.call(engine.dispose)
+
+
+async def create_tables(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+
+def test_password_hashing_runs_without_a_checked_out_connection(pooled_client):
+    client, pool = pooled_client
+    credentials = {'username': 'pool', 'email': 'pool@test.com', 'password': 'secret'}
+
+    assert client.post('/users', json=credentials).status_code == HTTPStatus.CREATED
+    token = client.post('/auth/token', data={'username': 'pool', 'password': 'secret'}).json()['access_token']
+    response = client.put('/users', json={**credentials, 'username': 'pool2'}, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    # Cadastro, login e atualização fazem um hash lento cada, mas nenhuma conexão fica emprestada por todo esse tempo
+    assert pool.checkout_hold.count >= 3  # noqa: PLR2004
+    assert pool.checkout_hold.max_seconds < SLOW_HASH_SECONDS / 2
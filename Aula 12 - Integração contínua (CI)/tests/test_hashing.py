@@ -0,0 +1,46 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
+
+from fast_zero.hashing import PasswordHasher, password_hasher
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_in_process_pool():
+    hasher = PasswordHasher(max_workers=1, max_pending=4)
+
+    try:
+        hashed = await hasher.hash('secret')
+
+        assert hashed.startswith('$argon2')
+        assert await hasher.verify('secret', hashed)
+        assert not await hasher.verify('wrong', hashed)
+    finally:
+        hasher.shutdown()
+
+    assert hasher.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_hasher_rejects_when_queue_is_full():
+    hasher = PasswordHasher(max_workers=0, max_pending=1)
+
+    results = await asyncio.gather(hasher.hash('a'), hasher.hash('b'), return_exceptions=True)
+    rejected = [result for result in results if isinstance(result, HTTPException)]
+
+    assert len(rejected) == 1
+    assert rejected[0].status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert rejected[0].headers == {'Retry-After': '1'}
+    assert hasher.metrics() == {'workers': 0, 'pending': 0, 'max_pending': 1, 'rejected': 1}
+
+
+def test_login_returns_503_when_hasher_is_saturated(client, user, monkeypatch):
+    monkeypatch.setattr(password_hasher, 'max_pending', 0)
+
+    response = client.post('/auth/token', data={'username': user.email, 'password': user.clean_password})
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json() == {'detail': 'Server busy, try again later'}
+    assert client.get('/metrics/password-hasher').json()['rejected'] >= 1
@@ -0,0 +1,58 @@
+import asyncio
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+
+import pytest
+
+from fast_zero.lanes import Lane
+
+
+@asynccontextmanager
+async def hold(lane: Lane):
+    # Reproduz o que o FastAPI faz com a dependência: entra no gerador, executa a rota e fecha o gerador
+    slot = lane()
+    await anext(slot)
+    try:
+        yield
+    finally:
+        await anext(slot, None)
+
+
+@pytest.mark.asyncio
+async def test_lane_limits_concurrency_and_records_wait():
+    lane = Lane('test', 1)
+    release = asyncio.Event()
+
+    async def first():
+        async with hold(lane):
+            await release.wait()
+
+    async def second():
+        async with hold(lane):
+            pass
+
+    tasks = [asyncio.create_task(first()), asyncio.create_task(second())]
+    await asyncio.sleep(0.01)
+
+    assert lane.metrics()['in_use'] == 1
+    assert lane.metrics()['waiting'] == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    metrics = lane.metrics()
+    assert metrics['in_use'] == 0
+    assert metrics['acquisitions'] == 2  # noqa: PLR2004
+    assert metrics['wait_max_ms'] >= 10  # noqa: PLR2004 - O segundo ficou esperando o primeiro liberar a vaga
+
+
+def test_lane_metrics_endpoint(client, user, create_token):
+    client.get('/todos', headers={'Authorization': f'Bearer {create_token(user.email)}'})
+
+    response = client.get('/metrics/lanes')
+    lanes = {lane['name']: lane for lane in response.json()}
+
+    assert response.status_code == HTTPStatus.OK
+    assert set(lanes) == {'auth', 'users', 'todos'}
+    assert lanes['todos']['acquisitions'] >= 1
+    assert lanes['todos']['in_use'] == 0
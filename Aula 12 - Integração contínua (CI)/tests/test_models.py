@@ -1,13 +1,17 @@
+import pytest
+from sqlalchemy import func, select, text
+
 from fast_zero.models import Todo, TodoState, User
 
 
-def test_create_model_user(session):
+@pytest.mark.asyncio
+async def test_create_model_user(session):
     user = User(username='test', email='test@test.com', password='secret')
     session.add(user)  # Adiciona o usuário na sessão, para depois ser salvo
-    session.commit()
+    await session.commit()
 
     # IMPORTANTE: Refresca a sessão para limpar o cache
-    session.refresh(user)
+    await session.refresh(user)
 
     # As asserções dentro da sessão
     assert user.username == 'test'
@@ -17,26 +21,58 @@ def test_create_model_user(session):
     assert user.id == 1
 
     # Teste opcional: Verifica se o usuário realmente foi persistido
+    user_id = user.id
     session.expire_all()  # Limpa o cache
-    db_user = session.get(User, user.id)  # Busca o usuário pelo ID
+    db_user = await session.get(User, user_id)  # Busca o usuário pelo ID
     assert db_user.id == 1
     assert db_user.username == 'test'
 
 
-def test_create_model_todo(session, user):
+@pytest.mark.asyncio
+async def test_create_model_todo(session, user):
     todo = Todo(title='test', description='testtest', state=TodoState.draft, user_id=user.id)
 
     session.add(todo)
-    session.commit()
-    session.refresh(todo)
+    await session.commit()
+    await session.refresh(todo)
 
+    todo_id, user_id = todo.id, user.id
     session.expire_all()
 
-    db_todo = session.get(Todo, todo.id)
+    db_todo = await session.get(Todo, todo_id)
 
     assert db_todo.title == 'test'
     assert db_todo.description == 'testtest'
     assert db_todo.state == TodoState.draft
-    assert db_todo.user_id == user.id
+    assert db_todo.user_id == user_id
     assert db_todo.created_at is not None
     assert db_todo.updated_at is not None
+
+
+async def explain(session, query):
+    compiled = query.compile(session.bind.sync_engine, compile_kwargs={'literal_binds': True})
+    rows = await session.execute(text(f'EXPLAIN QUERY PLAN {compiled}'))
+    return ' '.join(row.detail for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_list_todos_by_user_uses_user_id_index(session):
+    plan = await explain(session, select(Todo).where(Todo.user_id == 1).order_by(Todo.id).limit(10))
+
+    assert 'ix_todos_user_id_id' in plan
+    assert 'TEMP B-TREE' not in plan  # A ordenação por id vem do próprio índice
+
+
+@pytest.mark.asyncio
+async def test_list_todos_by_user_and_state_uses_composite_index(session):
+    plan = await explain(session, select(Todo).where(Todo.user_id == 1, Todo.state == TodoState.done).order_by(Todo.id))
+
+    assert 'ix_todos_user_id_state_id' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+@pytest.mark.asyncio
+async def test_login_by_email_uses_lower_email_index(session):
+    plan = await explain(session, select(User).where(func.lower(User.email) == 'test@test.com'))
+
+    assert 'ix_users_email_lower' in plan
@@ -0,0 +1,141 @@
+import logging
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException, Request
+from fastapi.security import OAuth2PasswordRequestForm
+
+from fast_zero import rate_limit
+from fast_zero.rate_limit import MemoryRateLimiter, RedisRateLimiter, SqliteRateLimiter, configured_workers, login_rate_limit, warn_if_rate_limit_is_per_worker
+from fast_zero.settings import settings
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_refills_over_time(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(rate_limit, 'monotonic', lambda: now[0])
+    limiter = MemoryRateLimiter()
+
+    assert await limiter.hit('key', capacity=2, rate=0.5) == 0
+    assert await limiter.hit('key', capacity=2, rate=0.5) == 0
+    assert await limiter.hit('key', capacity=2, rate=0.5) == 2  # noqa: PLR2004 - Uma ficha a cada 2 segundos
+
+    now[0] += 2
+    assert await limiter.hit('key', capacity=2, rate=0.5) == 0
+    assert await limiter.hit('other', capacity=2, rate=0.5) == 0  # Cada chave tem o seu balde
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_forgets_least_recently_used_keys():
+    limiter = MemoryRateLimiter(max_keys=1)
+    await limiter.hit('a', capacity=1, rate=1)
+    await limiter.hit('b', capacity=1, rate=1)
+
+    assert await limiter.hit('a', capacity=1, rate=1) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('fake_redis')
+async def test_redis_token_bucket_is_shared_between_workers():
+    worker_a = RedisRateLimiter('redis://localhost:6379/0')
+    worker_b = RedisRateLimiter('redis://localhost:6379/0')
+
+    assert await worker_a.hit('key', capacity=2, rate=0.01) == 0
+    assert await worker_b.hit('key', capacity=2, rate=0.01) == 0
+    # O balde é o mesmo nos dois workers, então a terceira tentativa é recusada por qualquer um deles
+    assert await worker_a.hit('key', capacity=2, rate=0.01) > 99  # noqa: PLR2004 - Uma ficha a cada 100 segundos
+    assert await worker_b.hit('other', capacity=2, rate=0.01) == 0
+
+    # O balde expira sozinho quando estaria cheio de novo (capacity / rate segundos)
+    assert await worker_a.client.ttl(f'{worker_a.prefix}key') == 200  # noqa: PLR2004
+
+    await worker_b.clear()
+    assert await worker_a.client.keys(f'{worker_a.prefix}*') == []
+    assert await worker_a.hit('key', capacity=2, rate=0.01) == 0
+
+
+@pytest.mark.asyncio
+async def test_sqlite_token_bucket_is_shared_between_workers(tmp_path, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(rate_limit, 'time', lambda: now[0])
+    worker_a = SqliteRateLimiter(str(tmp_path / 'rate_limit.db'), cleanup_every=3)
+    worker_b = SqliteRateLimiter(str(tmp_path / 'rate_limit.db'))
+
+    assert await worker_a.hit('key', capacity=2, rate=0.01) == 0
+    assert await worker_b.hit('key', capacity=2, rate=0.01) == 0
+    # O arquivo é o mesmo para os dois workers, então a terceira tentativa é recusada por qualquer um deles
+    assert await worker_a.hit('key', capacity=2, rate=0.01) == 100  # noqa: PLR2004 - Uma ficha a cada 100 segundos
+    assert await worker_b.hit('other', capacity=2, rate=0.01) == 0
+
+    # Baldes que já estariam cheios de novo (capacity / rate segundos) são apagados na limpeza periódica
+    now[0] += 201
+    await worker_a.hit('new', capacity=2, rate=0.01)  # Terceira tentativa deste worker
+    assert [key for (key,) in worker_b._connection.execute('SELECT key FROM buckets')] == ['new']
+
+    await worker_b.clear()
+    assert await worker_a.hit('new', capacity=1, rate=0.01) == 0
+
+
+@pytest.mark.parametrize(
+    ('argv', 'environ', 'expected'),
+    [
+        (['uvicorn', 'fast_zero.app:app'], {}, 1),
+        (['uvicorn', 'fast_zero.app:app', '--workers', '4'], {}, 4),
+        (['uvicorn', 'fast_zero.app:app', '--workers=3'], {}, 3),
+        (['gunicorn', '-w', '2', '-k', 'uvicorn.workers.UvicornWorker', 'fast_zero.app:app'], {}, 2),
+        (['uvicorn', 'fast_zero.app:app'], {'WEB_CONCURRENCY': '5'}, 5),
+    ],
+)
+def test_configured_workers(argv, environ, expected, monkeypatch):
+    monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+
+    assert configured_workers(argv) == expected
+
+
+@pytest.mark.parametrize(('limiter_class', 'workers', 'warns'), [(MemoryRateLimiter, '4', True), (MemoryRateLimiter, '1', False), (SqliteRateLimiter, '4', False)])
+def test_warns_when_memory_rate_limit_runs_with_several_workers(limiter_class, workers, warns, monkeypatch, caplog):
+    limiter = limiter_class(':memory:') if limiter_class is SqliteRateLimiter else limiter_class()
+    monkeypatch.setattr(rate_limit, 'rate_limiter', limiter)
+    monkeypatch.setattr(rate_limit.sys, 'argv', ['uvicorn', 'fast_zero.app:app', '--workers', workers])
+
+    with caplog.at_level(logging.WARNING, logger='fast_zero.rate_limit'):
+        warn_if_rate_limit_is_per_worker()
+
+    assert ('with 4 workers each client gets 4 times the configured attempts' in caplog.text) is warns
+
+
+@pytest.mark.asyncio
+async def test_login_rate_limit_without_client_address(monkeypatch):
+    monkeypatch.setattr(settings, 'LOGIN_RATE_LIMIT_IP_CAPACITY', 1)
+    request = Request({'type': 'http', 'method': 'POST', 'path': '/auth/token', 'headers': []})  # Sem "client", como em um socket unix
+    form_data = OAuth2PasswordRequestForm(username='someone', password='secret')
+
+    await login_rate_limit(request, form_data)
+
+    with pytest.raises(HTTPException) as error:
+        await login_rate_limit(request, form_data)
+
+    assert error.value.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_login_is_throttled_by_username_before_touching_the_database(client, user, queries, monkeypatch):
+    monkeypatch.setattr(settings, 'LOGIN_RATE_LIMIT_USERNAME_CAPACITY', 1)
+    client.post('/auth/token', data={'username': user.email, 'password': 'wrong'})
+    queries.clear()
+
+    response = client.post('/auth/token', data={'username': user.email.upper(), 'password': user.clean_password})
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.json() == {'detail': 'Too many login attempts, try again later'}
+    assert int(response.headers['Retry-After']) >= 1
+    assert queries == []
+
+
+def test_login_is_throttled_by_client_ip(client, user, monkeypatch):
+    monkeypatch.setattr(settings, 'LOGIN_RATE_LIMIT_IP_CAPACITY', 2)
+
+    responses = [client.post('/auth/token', data={'username': f'user{n}', 'password': 'x'}) for n in range(3)]
+
+    assert [response.status_code for response in responses] == [HTTPStatus.BAD_REQUEST, HTTPStatus.BAD_REQUEST, HTTPStatus.TOO_MANY_REQUESTS]
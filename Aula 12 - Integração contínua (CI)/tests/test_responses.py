@@ -0,0 +1,37 @@
+import json
+from http import HTTPStatus
+from types import SimpleNamespace
+
+from fastapi.encoders import jsonable_encoder
+
+from fast_zero.app import app
+from fast_zero.models import TodoState
+from fast_zero.responses import ORJSONResponse, SchemaListResponse, todo_list_adapter
+from fast_zero.schemas import TodoPublicSchema
+
+
+def test_schema_list_response_matches_response_model_output():
+    rows = [SimpleNamespace(id=n, title=f'Tarefa {n}', description='Descrição', state=TodoState.doing, user_id=1) for n in range(3)]
+
+    response = SchemaListResponse(todo_list_adapter, rows, headers={'X-Next-Cursor': 'abc'})
+
+    # Mesmo conteúdo que o FastAPI geraria com response_model=list[TodoPublicSchema]
+    expected = jsonable_encoder([TodoPublicSchema.model_validate(row, from_attributes=True) for row in rows])
+    assert json.loads(response.body) == expected
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/json'
+    assert response.headers['X-Next-Cursor'] == 'abc'
+
+
+def test_list_routes_return_json(client, user):
+    response = client.get('/users')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/json'
+    assert response.json() == [{'id': user.id, 'username': user.username, 'email': user.email}]
+
+
+def test_default_response_class_is_orjson():
+    route = next(route for route in app.routes if getattr(route, 'path', None) == '/metrics/user-cache')
+
+    assert route.response_class is ORJSONResponse  # Rotas sem response_class explícito herdam o padrão da aplicação
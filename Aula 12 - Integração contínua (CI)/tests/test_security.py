@@ -3,14 +3,16 @@ from zoneinfo import ZoneInfo
 
 import jwt
 
-from fast_zero.security import ALGORITHM, SECRET_KEY, create_access_token
+from fast_zero.security import create_access_token
+from fast_zero.settings import settings
+from fast_zero.tokens import token_engine
 
 
 def test_jwt():
     data = {'sub': 'test'}
     token = create_access_token(data)
 
-    decoded_token = jwt.decode(jwt=token, key=SECRET_KEY, algorithms=ALGORITHM)
+    decoded_token = jwt.decode(jwt=token, key=settings.SECRET_KEY, algorithms=settings.ALGORITHM)
 
     print(decoded_token)
 
@@ -21,7 +23,7 @@ def test_jwt():
 def test_token_expiration():
     data = {'sub': 'test'}
     token = create_access_token(data)
-    decoded = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    decoded = token_engine.verify(token)
 
     assert 'exp' in decoded
     assert decoded['exp'] > datetime.now(tz=ZoneInfo('UTC')).timestamp()
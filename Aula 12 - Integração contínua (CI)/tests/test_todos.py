@@ -1,10 +1,20 @@
+import csv
+import io
+import json
+import subprocess
+import sys
+from datetime import datetime
 from http import HTTPStatus
 
+import pytest
 from factory.base import Factory
 from factory.faker import Faker
 from factory.fuzzy import FuzzyChoice
+from pydantic import ValidationError
+from sqlalchemy import select, text
 
 from fast_zero.models import Todo, TodoState
+from fast_zero.settings import Settings, settings
 
 
 class TodoFactory(Factory):
@@ -17,7 +27,8 @@ class TodoFactory(Factory):
     user_id = 1
 
 
-def test_create_todo(client, session, user, create_token):
+@pytest.mark.asyncio
+async def test_create_todo(client, session, user, create_token):
     token = create_token(user.email)
 
     todo_data = {'title': 'test', 'description': 'testtest', 'state': TodoState.draft}
@@ -30,29 +41,31 @@ def test_create_todo(client, session, user, create_token):
     assert response.status_code == HTTPStatus.CREATED
     assert response.json() == todo_response_data
 
-    db_todo = session.get(Todo, 1)
+    db_todo = await session.get(Todo, 1)
 
     assert db_todo is not None
 
 
-def test_create_todo_with_user_id(client, session, user, create_token):
+@pytest.mark.asyncio
+async def test_create_todo_with_user_id(client, session, user, create_token):
     token = create_token(user.email)
 
     todo_data = {'title': 'test', 'description': 'testtest', 'state': TodoState.draft}
 
     client.post('/todos', headers={'Authorization': f'Bearer {token}'}, json=todo_data)
 
-    db_todo = session.get(Todo, 1)
+    db_todo = await session.get(Todo, 1)
 
     assert db_todo.user_id == user.id
 
 
-def test_list_todo(client, session, user, create_token):
+@pytest.mark.asyncio
+async def test_list_todo(client, session, user, create_token):
     token = create_token(user.email)
 
     test_todo = TodoFactory(user_id=user.id, title='Tarefa importante', description='Descrição detalhada da tarefa', state=TodoState.doing)
     session.add(test_todo)
-    session.commit()
+    await session.commit()
 
     response = client.get('/todos', headers={'Authorization': f'Bearer {token}'})
 
@@ -73,12 +86,13 @@ def test_list_todo(client, session, user, create_token):
     assert isinstance(response_data[0]['state'], str)
 
 
-def test_list_todos_should_return_5_todos(client, session, user, create_token):
+@pytest.mark.asyncio
+async def test_list_todos_should_return_5_todos(client, session, user, create_token):
     token = create_token(user.email)
 
     expected_todos = 5
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
 
     response = client.get(
         '/todos',  # sem query
@@ -88,12 +102,13 @@ def test_list_todos_should_return_5_todos(client, session, user, create_token):
     assert len(response.json()) == expected_todos
 
 
-def test_list_todos_pagination_should_return_2_todos(client, session, user, create_token):
+@pytest.mark.asyncio
+async def test_list_todos_pagination_should_return_2_todos(client, session, user, create_token):
     token = create_token(user.email)
 
     limit_todos = 2
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
 
     response = client.get(
         f'/todos?skip=1&limit={limit_todos}',
@@ -103,12 +118,13 @@ def test_list_todos_pagination_should_return_2_todos(client, session, user, crea
     assert len(response.json()) == limit_todos
 
 
-def test_list_todos_filter_title_should_return_5_todos(client, session, user, create_token):
+@pytest.mark.asyncio
+async def test_list_todos_filter_title_should_return_5_todos(client, session, user, create_token):
     token = create_token(user.email)
 
     expected_todos = 5
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id, title='Test todo 1'))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id, title='Test todo 1'))
+    await session.commit()
 
     response = client.get(
         '/todos?title=Test todo 1',
@@ -118,12 +134,13 @@ def test_list_todos_filter_title_should_return_5_todos(client, session, user, cr
     assert len(response.json()) == expected_todos
 
 
-def test_list_todos_filter_description_should_return_5_todos(client, session, user, create_token):
+@pytest.mark.asyncio
+async def test_list_todos_filter_description_should_return_5_todos(client, session, user, create_token):
     token = create_token(user.email)
 
     expected_todos = 5
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id, description='description'))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id, description='description'))
+    await session.commit()
 
     response = client.get(
         '/todos?description=desc',
@@ -133,12 +150,13 @@ def test_list_todos_filter_description_should_return_5_todos(client, session, us
     assert len(response.json()) == expected_todos
 
 
-def test_list_todos_filter_state_should_return_5_todos(client, session, user, create_token):
+@pytest.mark.asyncio
+async def test_list_todos_filter_state_should_return_5_todos(client, session, user, create_token):
     token = create_token(user.email)
 
     expected_todos = 5
-    session.bulk_save_objects(TodoFactory.create_batch(5, user_id=user.id, state=TodoState.draft))
-    session.commit()
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id, state=TodoState.draft))
+    await session.commit()
 
     response = client.get(
         '/todos?state=draft',
@@ -148,11 +166,12 @@ def test_list_todos_filter_state_should_return_5_todos(client, session, user, cr
     assert len(response.json()) == expected_todos
 
 
-def test_list_todos_filter_combined_should_return_5_todos(client, session, user, create_token):
+@pytest.mark.asyncio
+async def test_list_todos_filter_combined_should_return_5_todos(client, session, user, create_token):
     token = create_token(user.email)
 
     expected_todos = 5
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(
             5,
             user_id=user.id,
@@ -162,7 +181,7 @@ def test_list_todos_filter_combined_should_return_5_todos(client, session, user,
         )
     )
 
-    session.bulk_save_objects(
+    session.add_all(
         TodoFactory.create_batch(
             3,
             user_id=user.id,
@@ -171,7 +190,7 @@ def test_list_todos_filter_combined_should_return_5_todos(client, session, user,
             state=TodoState.todo,
         )
     )
-    session.commit()
+    await session.commit()
 
     response = client.get(
         '/todos?title=Test todo combined&description=combined&state=done',
@@ -181,17 +200,19 @@ def test_list_todos_filter_combined_should_return_5_todos(client, session, user,
     assert len(response.json()) == expected_todos
 
 
-def test_delete_todo(client, session, user, create_token):
+@pytest.mark.asyncio
+async def test_delete_todo(client, session, user, create_token):
     token = create_token(user.email)
 
     todo = TodoFactory(user_id=user.id)
     session.add(todo)
-    session.commit()
+    await session.commit()
 
     response = client.delete(f'/todos/{todo.id}', headers={'Authorization': f'Bearer {token}'})
 
+    todo_id = todo.id
     session.expire_all()
-    db_todo = session.get(Todo, todo.id)
+    db_todo = await session.get(Todo, todo_id)
 
     assert response.status_code == HTTPStatus.NO_CONTENT
     assert db_todo is None
@@ -207,13 +228,14 @@ def test_delete_todo_with_nonexistent_id_should_return_not_found(client, user, c
     assert response.json() == {'detail': 'Task not found.'}
 
 
-def test_delete_another_users_todo_should_return_not_found(client, session, user, user2, create_token):
+@pytest.mark.asyncio
+async def test_delete_another_users_todo_should_return_not_found(client, session, user, user2, create_token):
     # Testa quando um usuário tenta deletar TODO de outro usuário
     token_user2 = create_token(user2.email)
 
     todo = TodoFactory(user_id=user.id)  # todo pertencente ao user
     session.add(todo)
-    session.commit()
+    await session.commit()
 
     response = client.delete(  # tentando deletar o todo pertencente ao user, mas estando logado com o user2
         f'/todos/{todo.id}', headers={'Authorization': f'Bearer {token_user2}'}
@@ -223,13 +245,14 @@ def test_delete_another_users_todo_should_return_not_found(client, session, user
     assert response.json() == {'detail': 'Task not found.'}
 
 
-def test_patch_todo(client, session, user, create_token):
+@pytest.mark.asyncio
+async def test_patch_todo(client, session, user, create_token):
     token = create_token(user.email)
 
     todo = TodoFactory(user_id=user.id)
 
     session.add(todo)
-    session.commit()
+    await session.commit()
 
     response = client.patch(
         f'/todos/{todo.id}',
@@ -239,8 +262,9 @@ def test_patch_todo(client, session, user, create_token):
     assert response.status_code == HTTPStatus.OK
     assert response.json()['title'] == 'teste!'
 
+    todo_id = todo.id
     session.expire_all()
-    db_todo = session.get(Todo, todo.id)
+    db_todo = await session.get(Todo, todo_id)
 
     assert db_todo.title == 'teste!'
 
@@ -255,3 +279,404 @@ def test_patch_todo_error(client, user, create_token):
     )
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json() == {'detail': 'Task not found.'}
+
+
+def test_create_todo_fetches_generated_values_with_returning(client, user, create_token, queries):
+    token = create_token(user.email)
+
+    response = client.post('/todos', headers={'Authorization': f'Bearer {token}'}, json={'title': 'test', 'description': 'testtest', 'state': 'draft'})
+
+    assert response.status_code == HTTPStatus.CREATED
+    # SELECT do usuário autenticado + INSERT ... RETURNING (sem o SELECT do refresh)
+    assert len(queries) == 2  # noqa: PLR2004
+    assert 'RETURNING' in queries[-1]
+
+
+@pytest.mark.asyncio
+async def test_patch_todo_fetches_generated_values_with_returning(client, session, user, create_token, queries):
+    token = create_token(user.email)
+    session.add(TodoFactory(user_id=user.id))
+    await session.commit()
+    queries.clear()
+
+    response = client.patch('/todos/1', headers={'Authorization': f'Bearer {token}'}, json={'title': 'teste!'})
+
+    assert response.status_code == HTTPStatus.OK
+    # SELECT do usuário autenticado + UPDATE ... RETURNING com o filtro de dono (sem SELECT prévio da tarefa)
+    assert len(queries) == 2  # noqa: PLR2004
+    assert queries[-1].startswith('UPDATE')
+    assert 'RETURNING' in queries[-1]
+
+
+@pytest.mark.asyncio
+async def test_delete_todo_runs_single_statement(client, session, user, create_token, queries):
+    token = create_token(user.email)
+    session.add(TodoFactory(user_id=user.id))
+    await session.commit()
+    queries.clear()
+
+    response = client.delete('/todos/1', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    # SELECT do usuário autenticado + DELETE com o filtro de dono
+    assert len(queries) == 2  # noqa: PLR2004
+    assert queries[-1].startswith('DELETE')
+
+
+@pytest.mark.asyncio
+async def test_patch_another_users_todo_should_return_not_found(client, session, user, user2, create_token):
+    token_user2 = create_token(user2.email)
+    todo = TodoFactory(user_id=user.id, title='original')
+    session.add(todo)
+    await session.commit()
+
+    response = client.patch(f'/todos/{todo.id}', json={'title': 'hacked'}, headers={'Authorization': f'Bearer {token_user2}'})
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Task not found.'}
+
+    await session.refresh(todo)
+    assert todo.title == 'original'
+
+
+@pytest.mark.asyncio
+async def test_list_todos_cursor_pagination_walks_all_pages(client, session, user, create_token):
+    token = create_token(user.email)
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+
+    ids, cursor = [], None
+
+    while True:
+        params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        response = client.get('/todos', params=params, headers={'Authorization': f'Bearer {token}'})
+        ids += [todo['id'] for todo in response.json()]
+        cursor = response.headers.get('X-Next-Cursor')
+
+        if not cursor:
+            break
+
+    assert ids == [1, 2, 3, 4, 5]
+
+
+def test_list_todos_with_invalid_cursor_should_return_bad_request(client, user, create_token):
+    token = create_token(user.email)
+
+    response = client.get('/todos?cursor=invalid', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+@pytest.mark.asyncio
+async def test_list_todos_search_returns_ranked_matches(client, session, user, create_token):
+    token = create_token(user.email)
+    session.add_all([
+        TodoFactory(user_id=user.id, title='Comprar pão', description='padaria da esquina'),
+        TodoFactory(user_id=user.id, title='Relatório mensal', description='enviar o relatório de vendas do relatório anual'),
+        TodoFactory(user_id=user.id, title='Reunião', description='revisar relatório'),
+    ])
+    await session.commit()
+
+    response = client.get('/todos?q=relatorio', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert [todo['title'] for todo in response.json()] == ['Relatório mensal', 'Reunião']
+
+
+@pytest.mark.asyncio
+async def test_list_todos_search_follows_updates_and_deletes(client, session, user, user2, create_token):
+    token = create_token(user.email)
+    session.add_all([TodoFactory(user_id=user.id, title='antigo', description='x'), TodoFactory(user_id=user2.id, title='novo', description='x')])
+    await session.commit()
+
+    client.patch('/todos/1', json={'title': 'novo'}, headers={'Authorization': f'Bearer {token}'})
+    response = client.get('/todos?q=novo', headers={'Authorization': f'Bearer {token}'})
+
+    assert [todo['id'] for todo in response.json()] == [1]  # A tarefa do user2 não aparece
+
+    client.delete('/todos/1', headers={'Authorization': f'Bearer {token}'})
+    response = client.get('/todos?q=novo', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.json() == []
+
+
+def test_list_todos_search_with_cursor_should_return_bad_request(client, user, create_token):
+    token = create_token(user.email)
+
+    response = client.get('/todos?q=test&cursor=abc', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Cursor pagination is not supported with q'}
+
+
+def test_list_todos_search_escapes_fts_syntax(client, user, create_token):
+    token = create_token(user.email)
+
+    response = client.get('/todos', params={'q': 'a" OR NEAR(b'}, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('q', ['  ', '\t\n'])
+async def test_list_todos_blank_search_lists_everything(client, session, user, create_token, q):
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id))
+    await session.commit()
+    token = create_token(user.email)
+
+    response = client.get('/todos', params={'q': q}, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()) == 2  # noqa: PLR2004
+
+
+def test_search_structures_are_created_with_the_models_alone():
+    # Em um processo novo, sem importar fast_zero.search: o create_all dos modelos já precisa criar a tabela FTS5
+    script = (
+        'from sqlalchemy import create_engine, inspect\n'
+        'from fast_zero.models import table_registry\n'
+        "engine = create_engine('sqlite://')\n"
+        'table_registry.metadata.create_all(engine)\n'
+        "print('todos_fts' in inspect(engine).get_table_names())\n"
+    )
+
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == 'True'
+
+
+@pytest.mark.asyncio
+async def test_export_todos_ndjson_streams_every_row(client, session, user, create_token, monkeypatch):
+    monkeypatch.setattr(settings, 'TODO_EXPORT_BATCH_SIZE', 2)  # Força vários lotes
+    token = create_token(user.email)
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    session.add(TodoFactory(user_id=user.id + 1))  # Tarefa de outro usuário, não deve ser exportada
+    await session.commit()
+
+    response = client.get('/todos/export', headers={'Authorization': f'Bearer {token}'})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [line['id'] for line in lines] == [1, 2, 3, 4, 5]
+    assert set(lines[0]) == {'id', 'title', 'description', 'state', 'created_at', 'updated_at'}
+    # Datas em ISO-8601, como nas outras respostas da API
+    assert datetime.fromisoformat(lines[0]['created_at']).isoformat() == lines[0]['created_at']
+    assert 'T' in lines[0]['created_at']
+
+
+@pytest.mark.asyncio
+async def test_export_todos_csv(client, session, user, create_token):
+    token = create_token(user.email)
+    session.add(TodoFactory(user_id=user.id, title='a, b', description='c', state=TodoState.done))
+    await session.commit()
+
+    response = client.get('/todos/export?format=csv', headers={'Authorization': f'Bearer {token}'})
+    rows = list(csv.reader(io.StringIO(response.text)))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    assert rows[0] == ['id', 'title', 'description', 'state', 'created_at', 'updated_at']
+    assert rows[1][:4] == ['1', 'a, b', 'c', 'done']
+
+
+def test_create_todos_bulk(client, user, create_token, queries):
+    token = create_token(user.email)
+    todos = [{'title': f'todo {i}', 'description': 'bulk', 'state': 'todo'} for i in range(3)]
+
+    response = client.post('/todos/bulk', headers={'Authorization': f'Bearer {token}'}, json=todos)
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json() == {'ids': [1, 2, 3]}
+    # SELECT do usuário autenticado + um único INSERT de várias linhas
+    assert [query.split()[0] for query in queries] == ['SELECT', 'INSERT']
+
+    listed = client.get('/todos', headers={'Authorization': f'Bearer {token}'}).json()
+    assert [todo['title'] for todo in listed] == ['todo 0', 'todo 1', 'todo 2']
+
+
+def test_create_todos_bulk_reports_errors_per_item(client, user, create_token):
+    token = create_token(user.email)
+    todos = [
+        {'title': 'ok', 'description': 'ok', 'state': 'todo'},
+        {'title': 'sem descrição', 'state': 'todo'},
+        {'title': 'estado inválido', 'description': 'x', 'state': 'unknown'},
+    ]
+
+    response = client.post('/todos/bulk', headers={'Authorization': f'Bearer {token}'}, json=todos)
+    detail = response.json()['detail']
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert [error['index'] for error in detail] == [1, 2]
+    assert detail[0]['errors'][0]['loc'] == ['description']
+    assert detail[1]['errors'][0]['loc'] == ['state']
+
+    # Nenhum item é gravado quando algum é inválido
+    assert client.get('/todos', headers={'Authorization': f'Bearer {token}'}).json() == []
+
+
+def test_create_todos_bulk_above_limit(client, user, create_token, monkeypatch):
+    monkeypatch.setattr(settings, 'TODO_BULK_MAX_ITEMS', 2)
+    token = create_token(user.email)
+    todos = [{'title': 't', 'description': 'd', 'state': 'todo'}] * 3
+
+    response = client.post('/todos/bulk', headers={'Authorization': f'Bearer {token}'}, json=todos)
+
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    assert response.json() == {'detail': 'A maximum of 2 todos can be created per request'}
+
+
+@pytest.mark.asyncio
+async def test_patch_todos_state_bulk(client, session, user, create_token):
+    token = create_token(user.email)
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id, state=TodoState.done))
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id, state=TodoState.todo))
+    session.add(TodoFactory(user_id=user.id + 1, state=TodoState.done))  # Tarefa de outro usuário
+    await session.commit()
+
+    response = client.patch('/todos/bulk', json={'state': 'done', 'new_state': 'trash'}, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'affected': 3}
+
+    session.expire_all()
+    states = (await session.scalars(select(Todo.state).order_by(Todo.id))).all()
+    assert states == [TodoState.trash] * 3 + [TodoState.todo] * 2 + [TodoState.done]
+
+
+@pytest.mark.asyncio
+async def test_patch_todos_state_bulk_with_empty_ids_changes_nothing(client, session, user, create_token, queries):
+    token = create_token(user.email, user.id)
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id, state=TodoState.done))
+    await session.commit()
+    queries.clear()
+
+    # O cliente pediu "nenhuma tarefa"; sem o tratamento o filtro por ids seria ignorado e todas as 'done' iriam para a lixeira
+    response = client.patch('/todos/bulk', json={'ids': [], 'state': 'done', 'new_state': 'trash'}, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'affected': 0}
+    assert queries == []  # Nem chega ao banco
+    assert (await session.scalars(select(Todo.state))).all() == [TodoState.done] * 2
+
+
+@pytest.fixture
+def small_delete_chunks(monkeypatch):
+    monkeypatch.setattr(settings, 'TODO_BULK_DELETE_CHUNK_SIZE', 2)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('small_delete_chunks')
+async def test_delete_todos_bulk_in_chunks(client, session, user, create_token, queries):
+    token = create_token(user.email)
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id, state=TodoState.trash))
+    session.add(TodoFactory(user_id=user.id, state=TodoState.todo))
+    await session.commit()
+    queries.clear()
+
+    response = client.delete('/todos/bulk?state=trash', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'affected': 5}
+    assert sum(query.startswith('DELETE') for query in queries) == 3  # noqa: PLR2004 - Lotes de 2, 2 e 1
+
+    remaining = (await session.scalars(select(Todo.state))).all()
+    assert remaining == [TodoState.todo]
+
+
+@pytest.mark.asyncio
+async def test_delete_todos_bulk_by_ids(client, session, user, create_token):
+    token = create_token(user.email)
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+
+    response = client.delete('/todos/bulk?ids=1&ids=3', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.json() == {'affected': 2}
+    assert (await session.scalars(select(Todo.id))).all() == [2]
+
+
+def test_bulk_operations_require_a_filter(client, user, create_token):
+    token = create_token(user.email)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    responses = [client.delete('/todos/bulk', headers=headers), client.patch('/todos/bulk', json={'new_state': 'trash'}, headers=headers)]
+
+    for response in responses:
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {'detail': 'At least one filter is required'}
+
+
+def test_todo_routes_read_user_id_from_token_without_queries(client, user, create_token, queries):
+    token = create_token(user.email, user.id)
+    queries.clear()
+
+    response = client.get('/todos', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(queries) == 1  # Apenas o SELECT das tarefas, nenhum em users
+    assert 'FROM todos' in queries[0]
+
+
+def test_todo_routes_accept_tokens_without_user_id_claim(client, user, create_token, queries):
+    token = create_token(user.email)
+    queries.clear()
+
+    response = client.get('/todos', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert any('FROM users' in query for query in queries)
+
+
+@pytest.mark.asyncio
+async def test_list_todos_selects_only_public_columns(session, client, user, create_token, queries):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+    token = create_token(user.email, user.id)
+    queries.clear()
+
+    response = client.get('/todos', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()) == 3  # noqa: PLR2004
+    assert set(response.json()[0]) == {'id', 'title', 'description', 'state'}
+    assert 'todos.user_id' not in queries[0].split('WHERE')[0]
+    assert 'created_at' not in queries[0]
+
+
+@pytest.mark.parametrize('name', ['TODO_EXPORT_BATCH_SIZE', 'TODO_BULK_MAX_ITEMS', 'TODO_BULK_DELETE_CHUNK_SIZE'])
+def test_todo_batch_settings_must_be_positive(name):
+    with pytest.raises(ValidationError):
+        Settings(**{name: 0})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('request_args', [('/todos', {'title': 't', 'description': 'd', 'state': 'todo'}), ('/todos/bulk', [{'title': 't', 'description': 'd', 'state': 'todo'}])])
+async def test_create_todo_for_deleted_user_is_unauthorized(session, client, user, create_token, request_args):
+    path, body = request_args
+    await session.execute(text('PRAGMA foreign_keys = ON'))  # Faz o SQLite verificar a chave estrangeira como o Postgres
+    headers = {'Authorization': f'Bearer {create_token(user.email, user.id)}'}
+    client.delete('/users', headers=headers)
+
+    # O token com "uid" dispensa a consulta ao usuário, então é o INSERT que descobre que ele não existe mais
+    response = client.post(path, headers=headers, json=body)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json() == {'detail': 'Could not validate credentials'}
+    assert (await session.scalars(select(Todo))).all() == []
+
+
+def test_deleted_user_token_does_not_reach_next_signup(client, user, user2, create_token):
+    old_headers = {'Authorization': f'Bearer {create_token(user2.email, user2.id)}'}
+    old_id = user2.id
+    client.delete('/users', headers=old_headers)
+
+    # Sem AUTOINCREMENT o SQLite daria ao novo cadastro o id que acabou de ser liberado, e o "uid" do token antigo apontaria para ele
+    new_user = client.post('/users', json={'username': 'newcomer', 'email': 'newcomer@test.com', 'password': 'secret'}).json()
+    new_headers = {'Authorization': f'Bearer {create_token(new_user["email"], new_user["id"])}'}
+    client.post('/todos', headers=new_headers, json={'title': 'privada', 'description': 'só minha', 'state': 'todo'})
+
+    assert new_user['id'] != old_id
+    assert client.get('/todos', headers=old_headers).json() == []
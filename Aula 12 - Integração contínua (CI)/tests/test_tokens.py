@@ -0,0 +1,111 @@
+from http import HTTPStatus
+from time import time
+
+import jwt
+import pytest
+
+from fast_zero.generate_jwt_key import generate_private_key_pem
+from fast_zero.tokens import TokenEngine, VerifiedTokenCache, hmac_key, load_private_key
+
+
+@pytest.fixture(params=['ES256', 'EdDSA'])
+def asymmetric_keys(request, tmp_path):
+    """Duas chaves do algoritmo: a atual e a anterior à rotação."""
+    keys = []
+
+    for kid in ('2026-10', '2026-04'):
+        path = tmp_path / f'{kid}.pem'
+        path.write_bytes(generate_private_key_pem(request.param))
+        keys.append(load_private_key(request.param, path))
+
+    return request.param, keys
+
+
+def test_hmac_engine_signs_with_kid():
+    engine = TokenEngine('HS256', [hmac_key('secret')])
+
+    token = engine.encode({'sub': 'test'})
+
+    assert jwt.get_unverified_header(token)['kid'] == engine.active_key.kid
+    assert engine.decode(token) == {'sub': 'test'}
+    assert engine.jwks() == {'keys': []}
+
+
+def test_hmac_rotation_keeps_previous_secret_valid():
+    old_token = TokenEngine('HS256', [hmac_key('old-secret')]).encode({'sub': 'test'})
+
+    rotated = TokenEngine('HS256', [hmac_key('new-secret'), hmac_key('old-secret')])
+    without_old_key = TokenEngine('HS256', [hmac_key('new-secret')])
+
+    assert rotated.decode(old_token) == {'sub': 'test'}
+    with pytest.raises(jwt.PyJWTError):
+        without_old_key.decode(old_token)
+
+
+def test_asymmetric_engine_rotation_and_jwks(asymmetric_keys):
+    algorithm, (current_key, previous_key) = asymmetric_keys
+    old_token = TokenEngine(algorithm, [previous_key]).encode({'sub': 'test'})
+    engine = TokenEngine(algorithm, [current_key, previous_key])
+
+    new_token = engine.encode({'sub': 'test'})
+    jwks = engine.jwks()
+
+    assert jwt.get_unverified_header(new_token) == {'alg': algorithm, 'kid': '2026-10', 'typ': 'JWT'}
+    assert engine.decode(new_token) == engine.decode(old_token) == {'sub': 'test'}
+    assert [key['kid'] for key in jwks['keys']] == ['2026-10', '2026-04']
+    assert all('d' not in key for key in jwks['keys'])  # Só a parte pública é publicada
+
+
+def test_unsupported_algorithm_is_rejected():
+    with pytest.raises(ValueError, match='Unsupported JWT algorithm'):
+        TokenEngine('none', [hmac_key('secret')])
+
+
+def test_token_signed_by_unknown_key_is_unauthorized(client):
+    token = TokenEngine('HS256', [hmac_key('another-secret')]).encode({'sub': 'test@test.com'})
+
+    response = client.get('/todos', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_jwks_endpoint(client):
+    response = client.get('/auth/jwks.json')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'keys': []}
+
+
+def test_verified_token_cache_skips_signature_check(monkeypatch):
+    engine = TokenEngine('HS256', [hmac_key('secret')], VerifiedTokenCache(max_size=10))
+    token = engine.encode({'sub': 'test', 'exp': int(time()) + 60})
+    verifications = []
+    monkeypatch.setattr(engine, 'verify', lambda token: verifications.append(token) or TokenEngine.verify(engine, token))
+
+    claims = [engine.decode(token) for _ in range(3)]
+
+    assert len(verifications) == 1
+    assert claims[0] == claims[2]
+    assert engine.cache.metrics() == {'size': 1, 'max_size': 10, 'hits': 2, 'misses': 1}
+
+
+def test_verified_token_cache_expires_and_evicts():
+    cache = VerifiedTokenCache(max_size=1)
+    cache.set('expired', {'sub': 'a', 'exp': time() - 1})
+    cache.set('no-exp', {'sub': 'b'})
+    cache.set('first', {'sub': 'c', 'exp': time() + 60})
+    cache.set('second', {'sub': 'd', 'exp': time() + 60})
+
+    assert cache.get('expired') is None
+    assert cache.get('no-exp') is None
+    assert cache.get('first') is None  # Descartado pelo LRU
+    assert cache.get('second') == {'sub': 'd', 'exp': pytest.approx(time() + 60, abs=5)}
+
+
+def test_verified_token_cache_returns_copies():
+    cache = VerifiedTokenCache(max_size=1)
+    cache.set('token', {'sub': 'a', 'exp': time() + 60})
+
+    cache.get('token')['sub'] = 'changed'
+
+    assert cache.get('token')['sub'] == 'a'
@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import pytest
+from pydantic import ValidationError
+
+from fast_zero.settings import Settings
+from fast_zero.user_cache import CachedUser, MemoryUserCache, RedisUserCache, user_cache
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryUserCache(ttl=60, max_size=2)
+    await cache.set('a', CachedUser(1, 'a', 'a@test.com'))
+    await cache.set('b', CachedUser(2, 'b', 'b@test.com'))
+    await cache.get('a')  # 'a' passa a ser o mais recente
+    await cache.set('c', CachedUser(3, 'c', 'c@test.com'))
+
+    assert await cache.get('b') is None
+    assert await cache.get('a') == CachedUser(1, 'a', 'a@test.com')
+    assert cache.metrics() == {'backend': 'memory', 'size': 2, 'hits': 2, 'misses': 1}
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_expires_entries():
+    cache = MemoryUserCache(ttl=0, max_size=10)
+    await cache.set('a', CachedUser(1, 'a', 'a@test.com'))
+
+    assert await cache.get('a') is None
+    assert cache.metrics()['size'] == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('fake_redis')
+async def test_redis_cache_set_get_and_invalidate():
+    cache = RedisUserCache('redis://localhost:6379/0', ttl=60)
+    await cache.set('a@test.com', CachedUser(1, 'a', 'a@test.com'))
+
+    assert await cache.get('a@test.com') == CachedUser(1, 'a', 'a@test.com')
+    assert await cache.client.ttl(f'{cache.prefix}a@test.com') == 60  # noqa: PLR2004
+
+    await cache.invalidate('a@test.com')
+
+    assert await cache.get('a@test.com') is None
+    assert cache.metrics() == {'backend': 'redis', 'size': None, 'hits': 1, 'misses': 1}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('fake_redis')
+async def test_redis_cache_is_shared_between_workers():
+    worker_a = RedisUserCache('redis://localhost:6379/0', ttl=60)
+    worker_b = RedisUserCache('redis://localhost:6379/0', ttl=60)
+
+    await worker_a.set('a@test.com', CachedUser(1, 'a', 'a@test.com'))
+    assert await worker_b.get('a@test.com') == CachedUser(1, 'a', 'a@test.com')
+
+    # A invalidação feita por um worker vale na hora para os outros
+    await worker_b.invalidate('a@test.com')
+    assert await worker_a.get('a@test.com') is None
+
+    await worker_a.set('b@test.com', CachedUser(2, 'b', 'b@test.com'))
+    await worker_b.clear()
+    assert await worker_a.get('b@test.com') is None
+
+
+def test_user_cache_ttl_must_be_at_least_one_second():
+    with pytest.raises(ValidationError):
+        Settings(USER_CACHE_TTL_SECONDS=0)
+
+
+def test_current_user_is_cached_between_requests(client, user, create_token, queries):
+    headers = {'Authorization': f'Bearer {create_token(user.email)}'}
+
+    client.get('/todos', headers=headers)
+    queries.clear()
+    response = client.get('/todos', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert not any('FROM users' in query for query in queries)
+    assert client.get('/metrics/user-cache').json()['hits'] >= 1
+
+
+@pytest.mark.asyncio
+async def test_update_user_invalidates_cache(client, user, create_token):
+    headers = {'Authorization': f'Bearer {create_token(user.email)}'}
+    client.get('/todos', headers=headers)
+    assert await user_cache.get(user.email) is not None
+
+    client.put('/users', headers=headers, json={'username': 'renamed', 'email': 'renamed@test.com', 'password': 'secret'})
+
+    assert await user_cache.get(user.email) is None
+    # O token antigo aponta para o email anterior, que não existe mais
+    assert client.get('/todos', headers=headers).status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_deleted_user_token_is_rejected(client, user, create_token):
+    headers = {'Authorization': f'Bearer {create_token(user.email)}'}
+    client.get('/todos', headers=headers)
+
+    client.delete('/users', headers=headers)
+
+    assert client.get('/todos', headers=headers).status_code == HTTPStatus.UNAUTHORIZED
@@ -1,13 +1,16 @@
 from http import HTTPStatus
 
+import pytest
 from sqlalchemy import select
 
+from fast_zero.hashing import password_hasher
 from fast_zero.models import User
 from fast_zero.schemas import UserPublicSchema
 from fast_zero.security import verify_password
 
 
-def test_create_user_success(client, session):
+@pytest.mark.asyncio
+async def test_create_user_success(client, session):
     user_data = {
         'username': 'test_name',
         'email': 'teste@example.com',
@@ -25,7 +28,7 @@ def test_create_user_success(client, session):
     assert response.json() == response_user_data
 
     # Verifica se o usuário foi realmente criado no banco de dados
-    db_user = session.scalar(select(User).where((User.id == 1) & (User.username == user_data['username']) & (User.email == user_data['email'])))
+    db_user = await session.scalar(select(User).where((User.id == 1) & (User.username == user_data['username']) & (User.email == user_data['email'])))
 
     assert db_user is not None
 
@@ -80,7 +83,8 @@ def test_read_users_with_user_success(client, user):
     assert response.json() == [user_data]
 
 
-def test_update_user_success(client, user, session, create_token):
+@pytest.mark.asyncio
+async def test_update_user_success(client, user, session, create_token):
     token = create_token(user.email)
 
     user_data = {
@@ -98,7 +102,7 @@ def test_update_user_success(client, user, session, create_token):
     assert response.status_code == HTTPStatus.OK
     assert response.json() == response_user_data
 
-    session.refresh(user)  # Atualiza o objeto user com os dados do banco de dados
+    await session.refresh(user)  # Atualiza o objeto user com os dados do banco de dados
     assert user.username == user_data['username']
     assert user.email == user_data['email']
     assert verify_password(user_data['password'], user.password)
@@ -149,7 +153,8 @@ def test_update_user_with_duplicate_email(client, user, user2, session, create_t
     assert response.json() == {'detail': 'Email already registered'}
 
 
-def test_delete_user_success(client, user, session, create_token):
+@pytest.mark.asyncio
+async def test_delete_user_success(client, user, session, create_token):
     token = create_token(user.email)
 
     response = client.delete('/users', headers={'Authorization': f'Bearer {token}'})
@@ -158,7 +163,7 @@ def test_delete_user_success(client, user, session, create_token):
     assert not response.text
 
     # Verifica se o usuário foi realmente deletado do banco de dados
-    db_user = session.scalar(select(User).where(User.id == 1))
+    db_user = await session.scalar(select(User).where(User.id == 1))
     assert db_user is None
 
 
@@ -183,3 +188,117 @@ def test_detail_user_not_found(client):
     response = client.get('/users/10000')  # ID inexistente
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json() == {'detail': 'User not found'}
+
+
+def test_create_user_fetches_generated_values_with_returning(client, queries):
+    response = client.post('/users', json={'username': 'test_name', 'email': 'teste@example.com', 'password': 'secret'})
+
+    assert response.status_code == HTTPStatus.CREATED
+    # Um único INSERT ... ON CONFLICT DO NOTHING RETURNING (sem o SELECT de validação nem o do refresh)
+    assert len(queries) == 1
+    assert 'ON CONFLICT DO NOTHING' in queries[0]
+    assert 'RETURNING' in queries[0]
+
+
+def test_create_user_conflict_does_not_insert(client, user, queries):
+    expected = [{'id': user.id, 'username': user.username, 'email': user.email}]  # Lido antes: o rollback do conflito expira o objeto do fixture
+    response = client.post('/users', json={'username': user.username, 'email': 'other@example.com', 'password': 'secret'})
+
+    # O INSERT vem primeiro; só depois do conflito uma consulta descobre qual campo está duplicado
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert queries[0].startswith('INSERT')
+    assert len(queries) == 2  # noqa: PLR2004
+    assert client.get('/users').json() == expected
+
+
+def test_update_user_fetches_generated_values_with_returning(client, user, create_token, queries):
+    token = create_token(user.email)
+
+    response = client.put(
+        '/users',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'username': 'test_updated_name', 'email': 'teste_updated@example.com', 'password': 'secret'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert queries[-1].startswith('UPDATE')
+    assert 'RETURNING' in queries[-1]
+
+
+def test_list_users_cursor_pagination(client, user, user2):
+    first_page = client.get('/users?limit=1')
+    cursor = first_page.headers['X-Next-Cursor']
+
+    second_page = client.get('/users', params={'limit': 1, 'cursor': cursor})
+
+    assert [u['id'] for u in first_page.json()] == [user.id]
+    assert [u['id'] for u in second_page.json()] == [user2.id]
+
+
+@pytest.fixture
+def no_password_hashing(monkeypatch):
+    async def fail(password):  # pragma: no cover
+        raise AssertionError('password should not be hashed')
+
+    monkeypatch.setattr(password_hasher, 'hash', fail)
+
+
+@pytest.mark.usefixtures('no_password_hashing')
+def test_patch_user_username_only(client, user, create_token, queries):
+    token = create_token(user.email)
+    queries.clear()
+
+    response = client.patch('/users', json={'username': 'renamed', 'email': user.email}, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'id': user.id, 'username': 'renamed', 'email': user.email}
+    # O email não mudou, então a verificação de unicidade consulta só o username
+    validations = [query for query in queries if 'WHERE users.username = ?' in query]
+    assert len(validations) == 1
+    assert 'users.email' not in validations[0].split('WHERE')[1]
+
+
+@pytest.mark.usefixtures('no_password_hashing')
+def test_patch_user_without_changes_skips_the_database(client, user, create_token, queries):
+    token = create_token(user.email)
+    client.get('/todos', headers={'Authorization': f'Bearer {token}'})  # Coloca o usuário no cache
+    queries.clear()
+
+    response = client.patch('/users', json={'username': user.username}, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['username'] == user.username
+    assert queries == []
+
+
+def test_patch_user_password(client, user, create_token):
+    token = create_token(user.email)
+
+    response = client.patch('/users', json={'password': 'new-password'}, headers={'Authorization': f'Bearer {token}'})
+    login = client.post('/auth/token', data={'username': user.email, 'password': 'new-password'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert login.status_code == HTTPStatus.OK
+
+
+def test_patch_user_with_duplicate_email(client, user, user2, create_token):
+    token = create_token(user.email)
+
+    response = client.patch('/users', json={'email': user2.email}, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Email already registered'}
+
+
+def test_list_and_detail_users_select_only_public_columns(client, user, queries):
+    list_response = client.get('/users')
+    detail_response = client.get(f'/users/{user.id}')
+
+    assert list_response.status_code == HTTPStatus.OK
+    assert detail_response.status_code == HTTPStatus.OK
+    assert detail_response.json() == list_response.json()[0]
+
+    # Nem o hash da senha nem os timestamps saem do banco
+    for query in queries:
+        assert 'users.password' not in query
+        assert 'created_at' not in query